@@ -1,27 +1,81 @@
-from fastapi import Depends, HTTPException, status
+import math
+import time
+from typing import Optional
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, ReplicaSessionLocal, get_async_db
+from app.core.instrumentation import registry
 from app.models.user import User, UserRole
+from app.schemas.user import TokenPayload
+from app.services.token_revocation import token_revocations
+from app.utils.cache import TTLCache
 from app.utils.jwt import verify_token
+from app.utils.metrics import Observed
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
+# Снимки пользователей по id, чтобы не обращаться к БД на каждый запрос.
+# Изменения пользователя сбрасывают запись только в этом процессе; в остальных
+# воркерах устаревший снимок живет до USER_CACHE_TTL_SECONDS
+user_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
 
-def get_current_user(
+registry.register(Observed("user_cache_hits_total", "Cached user snapshot hits", "counter", lambda: user_cache.hits))
+registry.register(Observed("user_cache_misses_total", "Cached user snapshot misses", "counter", lambda: user_cache.misses))
+registry.register(Observed("user_cache_size", "Cached user snapshots", "gauge", lambda: user_cache.stats()["size"]))
+
+_USER_FIELDS = ("id", "email", "full_name", "hashed_password", "role")
+
+# Пользователи, недавно изменившие данные в этом процессе: их чтения идут в основную БД
+recent_writers = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.READ_YOUR_WRITES_SECONDS)
+
+# Время последней записи клиента. Ответ на запись возвращает его, клиент
+# присылает обратно, и любой воркер направит его чтения в основную БД
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.id)
+
+
+async def _load_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if not user:
+            return None
+        snapshot = {field: getattr(user, field) for field in _USER_FIELDS}
+        user_cache.set(user_id, snapshot)
+    # Каждый запрос получает собственный объект, не привязанный к сессии
+    return User(**snapshot)
+
+
+async def get_current_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> TokenPayload:
     token = credentials.credentials
     token_data = verify_token(token, "access")
     
-    if not token_data or not token_data.sub:
+    # Отзыв проверяется в памяти; в БД — только при срабатывании фильтра Блума
+    if not token_data or not token_data.sub or await token_revocations.is_revoked(db, token_data):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Не удалось подтвердить учетные данные"
         )
-    
-    user = db.query(User).filter(User.id == int(token_data.sub)).first()
+    return token_data
+
+
+async def get_current_user(
+    token_data: TokenPayload = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    user = await _load_user(db, int(token_data.sub))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -32,7 +86,7 @@ def get_current_user(
 
 
 def require_role(required_role: UserRole):
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -42,7 +96,7 @@ def require_role(required_role: UserRole):
     return role_checker
 
 
-def get_teacher(current_user: User = Depends(get_current_user)) -> User:
+async def get_teacher(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role != UserRole.teacher:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -51,10 +105,56 @@ def get_teacher(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def get_student(current_user: User = Depends(get_current_user)) -> User:
+async def get_student(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role != UserRole.student:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Доступ запрещен: требуется роль студента"
         )
     return current_user
+
+
+def _token_user_id(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[int]:
+    # Только выбор БД: проверку пользователя и отзыва токена делает get_current_user
+    token_data = verify_token(credentials.credentials, "access") if credentials else None
+    return token_data.sub if token_data else None
+
+
+def _wrote_recently(request: Request, user_id: Optional[int]) -> bool:
+    if user_id and recent_writers.get(user_id):
+        return True
+    try:
+        written_at = float(request.headers.get(LAST_WRITE_HEADER, ""))
+    except ValueError:
+        return False
+    # Часы воркеров могут немного расходиться, поэтому окно в обе стороны
+    return math.isfinite(written_at) and abs(time.time() - written_at) < settings.READ_YOUR_WRITES_SECONDS
+
+
+async def get_read_db(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Сессия для GET-обработчиков: реплика, а для клиента сразу после его записи — основная БД."""
+    user_id = _token_user_id(credentials)
+    session_factory = AsyncSessionLocal if _wrote_recently(request, user_id) else ReplicaSessionLocal
+    async with session_factory() as db:
+        yield db
+
+
+async def get_write_db(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> AsyncSession:
+    """Сессия основной БД для изменяющих обработчиков.
+
+    Пользователь отмечается в этом процессе, а клиент получает
+    LAST_WRITE_HEADER, поэтому его следующие чтения в течение
+    READ_YOUR_WRITES_SECONDS не уйдут на отстающую реплику ни в одном воркере.
+    """
+    user_id = _token_user_id(credentials)
+    if user_id:
+        recent_writers.set(user_id, True)
+    response.headers[LAST_WRITE_HEADER] = f"{time.time():.3f}"
+    return db
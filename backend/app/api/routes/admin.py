@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User, UserRole
+from app.schemas.analytics import TeacherWeekUtilization
+from app.services.export_service import CSV, MEDIA_TYPES, ExportService
+from app.services.utilization_service import UtilizationService
+from app.api.deps import get_read_db, require_role
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
+
+MAX_ANALYTICS_DAYS = 366
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+ExportFormat = Literal["csv", "ndjson"]
+
+
+def _export_response(query: Select, fmt: str, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        ExportService.stream(query, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+
+@router.get("/exports/bookings")
+async def export_bookings(
+    fmt: ExportFormat = Query(CSV, alias="format"),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    current_user: User = Depends(require_role(UserRole.admin))
+):
+    """Все бронирования с именами преподавателя и студента, по возрастанию id."""
+    return _export_response(ExportService.bookings_query(date_from, date_to), fmt, "bookings")
+
+
+@router.get("/exports/availability")
+async def export_availability(
+    fmt: ExportFormat = Query(CSV, alias="format"),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    teacher_id: Optional[int] = None,
+    current_user: User = Depends(require_role(UserRole.admin))
+):
+    """Все слоты с именем преподавателя, по возрастанию id."""
+    return _export_response(ExportService.availability_query(date_from, date_to, teacher_id), fmt, "availability")
+
+
+@router.get("/analytics/utilization", response_model=List[TeacherWeekUtilization])
+async def teacher_utilization(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    teacher_ids: Optional[List[int]] = Query(None, alias="teacher_id", max_length=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(require_role(UserRole.admin))
+):
+    """Предложенные и занятые часы, доли подтверждений и отмен по преподавателям и неделям.
+
+    По умолчанию — последние четыре недели; `to` не включается.
+    """
+    date_to = date_to or date.today() + timedelta(days=1)
+    date_from = date_from or date_to - timedelta(weeks=4)
+    if date_to <= date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Window end must be after window start"
+        )
+    if date_to - date_from > timedelta(days=MAX_ANALYTICS_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Window must not exceed {MAX_ANALYTICS_DAYS} days"
+        )
+    return await UtilizationService.weekly(db, date_from, date_to, teacher_ids)
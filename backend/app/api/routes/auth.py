@@ -1,18 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.schemas.user import AuthResponse, UserCreate, UserLogin, UserResponse, Token, TokenRefresh
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.schemas.user import (
+    AuthResponse, LogoutRequest, PasswordChange, UserCreate, UserLogin, UserResponse, Token, TokenPayload, TokenRefresh
+)
 from app.services.auth_service import AuthService
-from app.api.deps import get_current_user
+from app.api.deps import get_current_token, get_current_user
 from app.models.user import User
-from app.utils.jwt import verify_token
+from typing import Optional
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    user = AuthService.create_user(db, user_data)
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    user = await AuthService.create_user(db, user_data)
     tokens = AuthService.create_tokens(user.id)
     return AuthResponse(
         access_token=tokens.access_token,
@@ -21,8 +23,8 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=AuthResponse)
-def login(login_data: UserLogin, db: Session = Depends(get_db)):
-    user = AuthService.authenticate_user(db, login_data)
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await AuthService.authenticate_user(db, login_data)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,18 +40,28 @@ def login(login_data: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
-    token_payload = verify_token(token_data.refresh_token, "refresh")
-    if not token_payload or not token_payload.sub:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Недопустимый refresh токен"
-        )
-    
-    tokens = AuthService.create_tokens(int(token_payload.sub))
-    return tokens
+async def refresh_token(token_data: TokenRefresh, db: AsyncSession = Depends(get_async_db)):
+    return await AuthService.rotate_refresh_token(db, token_data.refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    db: AsyncSession = Depends(get_async_db),
+    token_data: TokenPayload = Depends(get_current_token)
+):
+    await AuthService.logout(db, token_data, logout_data.refresh_token if logout_data else None)
+
+
+@router.post("/change-password", response_model=Token)
+async def change_password(
+    password_data: PasswordChange,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await AuthService.change_password(db, current_user.id, password_data)
 
 
 @router.get("/users/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
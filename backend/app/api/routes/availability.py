@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.availability import FreeSlotResponse, ScheduleGridResponse
+from app.services.availability_service import AvailabilityService, free_slot_list
+from app.api.deps import get_read_db
+from app.utils.intervals import as_naive_utc
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, next_cursor
+from typing import List, Optional
+from datetime import datetime, timedelta
+
+MAX_GRID_TEACHERS = 50
+MAX_GRID_DAYS = 31
+
+router = APIRouter(prefix="/api/availability", tags=["availability"])
+
+
+@router.get("/search", response_model=List[FreeSlotResponse])
+async def search_free_slots(
+    window_from: Optional[datetime] = Query(None, alias="from"),
+    window_to: Optional[datetime] = Query(None, alias="to"),
+    min_duration: Optional[int] = Query(None, ge=1, le=24 * 60, description="Минимальная длительность, минут"),
+    teacher_ids: Optional[List[int]] = Query(None, alias="teacher_id", max_length=100),
+    per_teacher: bool = Query(False, description="Только ближайший слот каждого преподавателя"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db)
+):
+    now = datetime.utcnow()
+    window_from = as_naive_utc(window_from) if window_from is not None else now
+    window_to = as_naive_utc(window_to) if window_to is not None else None
+    if window_from < now:
+        window_from = now
+    if window_to is not None and window_to <= window_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Window end must be after window start"
+        )
+
+    slots = await AvailabilityService.search_free_slots(
+        db, window_from, window_to,
+        min_duration=min_duration, teacher_ids=teacher_ids, per_teacher=per_teacher,
+        cursor=None if per_teacher else cursor, limit=limit
+    )
+    headers = {}
+    if not per_teacher:
+        cursor_value = next_cursor(slots, limit, "start_time", "id")
+        if cursor_value:
+            headers[NEXT_CURSOR_HEADER] = cursor_value
+    return free_slot_list.response(slots, headers)
+
+
+@router.get("/grid", response_model=ScheduleGridResponse)
+async def get_schedule_grid(
+    teacher_ids: List[int] = Query(..., alias="teacher_id", min_length=1, max_length=MAX_GRID_TEACHERS),
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    start, end = as_naive_utc(start), as_naive_utc(end)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Window end must be after window start"
+        )
+    if end - start > timedelta(days=MAX_GRID_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Window must not exceed {MAX_GRID_DAYS} days"
+        )
+
+    grid = await AvailabilityService.schedule_grid(db, teacher_ids, start, end)
+    # Сериализуем модель напрямую, без повторной проверки response_model
+    return Response(content=grid.model_dump_json(), media_type="application/json")
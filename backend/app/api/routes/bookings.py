@@ -1,48 +1,74 @@
-from fastapi import APIRouter, Depends,  status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
+from app.models.booking import BookingStatus
 from app.schemas.booking import BookingCreate, BookingResponse, BookingWithDetails
-from app.services.booking_service import BookingService
-from app.api.deps import get_current_user, get_student, get_teacher
-from typing import List
+from app.services.booking_service import BookingService, booking_details_list
+from app.services.change_tracker import USER_BOOKINGS, ChangeTracker
+from app.api.deps import get_current_user, get_read_db, get_student, get_teacher, get_write_db
+from app.utils.etag import etag_matches, make_etag
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, next_cursor
+from typing import List, Optional
+from datetime import datetime
 
 router = APIRouter(prefix="/api/bookings", tags=["bookings"])
 
 
 @router.post("", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
-def create_booking(
+async def create_booking(
     booking_data: BookingCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_user: User = Depends(get_student)
 ):
-    booking = BookingService.create_booking(db, booking_data, current_user.id)
+    booking = await BookingService.create_booking(db, booking_data, current_user.id)
     return booking
 
 
 @router.get("", response_model=List[BookingWithDetails])
-def get_my_bookings(
-    db: Session = Depends(get_db),
+async def get_my_bookings(
+    status_filter: Optional[BookingStatus] = Query(None, alias="status"),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    bookings = BookingService.get_user_bookings(db, current_user.id, current_user.role.value)
-    return bookings
+    version = await ChangeTracker.version(db, USER_BOOKINGS, current_user.id)
+    etag = make_etag(
+        "bookings", current_user.id, current_user.role.value, version,
+        status_filter, date_from, date_to, cursor, limit
+    )
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    headers = {"ETag": etag}
+
+    bookings = await BookingService.get_user_bookings(
+        db, current_user.id, current_user.role.value,
+        status_filter=status_filter, date_from=date_from, date_to=date_to,
+        cursor=cursor, limit=limit
+    )
+    cursor_value = next_cursor(bookings, limit, "id")
+    if cursor_value:
+        headers[NEXT_CURSOR_HEADER] = cursor_value
+    return booking_details_list.response(bookings, headers)
 
 
 @router.put("/{booking_id}/confirm", response_model=BookingResponse)
-def confirm_booking(
+async def confirm_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_user: User = Depends(get_teacher)
 ):
-    booking = BookingService.confirm_booking(db, booking_id, current_user.id)
+    booking = await BookingService.confirm_booking(db, booking_id, current_user.id)
     return booking
 
 
 @router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
-def cancel_booking(
+async def cancel_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_user: User = Depends(get_current_user)
 ):
-    BookingService.cancel_booking(db, booking_id, current_user.id)
+    await BookingService.cancel_booking(db, booking_id, current_user.id)
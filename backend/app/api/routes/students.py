@@ -1,19 +1,45 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
+from app.models.booking import BookingStatus
 from app.schemas.booking import BookingWithDetails
-from app.services.booking_service import BookingService
-from app.api.deps import get_student
-from typing import List
+from app.services.booking_service import BookingService, booking_details_list
+from app.services.change_tracker import USER_BOOKINGS, ChangeTracker
+from app.api.deps import get_read_db, get_student
+from app.utils.etag import etag_matches, make_etag
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, next_cursor
+from typing import List, Optional
+from datetime import datetime
 
 router = APIRouter(prefix="/api/students", tags=["students"])
 
 
 @router.get("/my-bookings", response_model=List[BookingWithDetails])
-def get_my_bookings(
-    db: Session = Depends(get_db),
+async def get_my_bookings(
+    status_filter: Optional[BookingStatus] = Query(None, alias="status"),
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_student)
 ):
-    bookings = BookingService.get_user_bookings(db, current_user.id, current_user.role.value)
-    return bookings
+    version = await ChangeTracker.version(db, USER_BOOKINGS, current_user.id)
+    etag = make_etag(
+        "bookings", current_user.id, current_user.role.value, version,
+        status_filter, date_from, date_to, cursor, limit
+    )
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    headers = {"ETag": etag}
+
+    bookings = await BookingService.get_user_bookings(
+        db, current_user.id, current_user.role.value,
+        status_filter=status_filter, date_from=date_from, date_to=date_to,
+        cursor=cursor, limit=limit
+    )
+    cursor_value = next_cursor(bookings, limit, "id")
+    if cursor_value:
+        headers[NEXT_CURSOR_HEADER] = cursor_value
+    return booking_details_list.response(bookings, headers)
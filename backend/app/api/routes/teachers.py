@@ -1,47 +1,156 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.models.user import User, UserRole
 from app.models.availability import Availability
-from app.schemas.availability import AvailabilityCreate, AvailabilityUpdate, AvailabilityResponse
+from app.schemas.availability import (
+    AvailabilityBulkCreate, AvailabilityBulkResponse, AvailabilityCreate, AvailabilityUpdate, AvailabilityResponse
+)
+from app.services.availability_service import AvailabilityService
+from app.services.change_tracker import TEACHER_AVAILABILITY, ChangeTracker
+from app.services.slot_events import SLOT_CREATED, SLOT_DELETED, SLOT_UPDATED, slot_events, slot_payload
+from app.services.teacher_directory import teacher_directory
+from app.services.utilization_service import UtilizationService
 from app.schemas.user import UserResponse
-from app.api.deps import get_current_user, get_teacher
-from typing import List
+from app.api.deps import get_current_user, get_read_db, get_teacher, get_write_db
+from app.utils.etag import etag_matches, make_etag
+from app.utils.serialization import ListSerializer
+from app.utils.intervals import as_naive_utc
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+)
+from typing import List, Optional
 from datetime import datetime, timezone
+import asyncio
+import json
+import time
 
 router = APIRouter(prefix="/api/teachers", tags=["teachers"])
 
+availability_list = ListSerializer(AvailabilityResponse)
+
 
 @router.get("", response_model=List[UserResponse])
-def get_teachers(db: Session = Depends(get_db)):
-    teachers = db.query(User).filter(User.role == UserRole.teacher).all()
-    return teachers
+async def get_teachers(
+    q: Optional[str] = Query(None, max_length=100),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    page = await teacher_directory.get_page(db, q, cursor, limit)
+    headers = {
+        "ETag": page.etag,
+        "Cache-Control": f"public, max-age={settings.TEACHER_DIRECTORY_MAX_AGE}, must-revalidate",
+    }
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if etag_matches(if_none_match, page.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+
+@router.get("/{teacher_id}", response_model=UserResponse)
+async def get_teacher_profile(teacher_id: int, db: AsyncSession = Depends(get_read_db)):
+    teacher = await db.scalar(select(User).where(User.id == teacher_id, User.role == UserRole.teacher))
+    if not teacher:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Teacher not found"
+        )
+    return teacher
+
+
+@router.get("/{teacher_id}/events")
+async def stream_teacher_events(teacher_id: int, request: Request):
+    """Server-Sent Events: создание, изменение, бронирование и освобождение слотов преподавателя."""
+
+    async def event_stream():
+        async with slot_events.subscribe(teacher_id) as queue:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/{teacher_id}/availability", response_model=List[AvailabilityResponse])
-def get_teacher_availability(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = db.query(User).filter(User.id == teacher_id, User.role == UserRole.teacher).first()
+async def get_teacher_availability(
+    teacher_id: int,
+    window_from: Optional[datetime] = Query(None, alias="from"),
+    window_to: Optional[datetime] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Список зависит и от текущего времени (прошедшие слоты скрываются),
+    # поэтому в ETag входит номер временного окна
+    version = await ChangeTracker.version(db, TEACHER_AVAILABILITY, teacher_id)
+    time_bucket = int(time.time() // settings.AVAILABILITY_ETAG_WINDOW_SECONDS)
+    etag = make_etag("availability", teacher_id, version, time_bucket, window_from, window_to, cursor, limit)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    headers = {"ETag": etag}
+
+    teacher = await db.scalar(select(User.id).where(User.id == teacher_id, User.role == UserRole.teacher))
     if not teacher:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Teacher not found"
         )
     
-    availabilities = db.query(Availability).filter(
+    now = datetime.utcnow()
+    if window_from is not None:
+        window_from = as_naive_utc(window_from)
+    if window_to is not None:
+        window_to = as_naive_utc(window_to)
+    if window_from is None or window_from < now:
+        window_from = now
+
+    query = select(Availability).where(
         Availability.teacher_id == teacher_id,
         Availability.is_booked == False,
-        Availability.start_time > datetime.utcnow()
-    ).all()
-    return availabilities
+        Availability.start_time > window_from
+    )
+    if window_to:
+        query = query.where(Availability.start_time < window_to)
+    if cursor:
+        last_start, last_id = decode_cursor(cursor, datetime, int)
+        query = query.where(or_(
+            Availability.start_time > last_start,
+            and_(Availability.start_time == last_start, Availability.id > last_id)
+        ))
+
+    availabilities = (await db.scalars(
+        query.order_by(Availability.start_time, Availability.id).limit(limit)
+    )).all()
+    cursor_value = next_cursor(availabilities, limit, "start_time", "id")
+    if cursor_value:
+        headers[NEXT_CURSOR_HEADER] = cursor_value
+    return availability_list.response(availability_list.from_rows(availabilities), headers)
 
 
 from datetime import datetime, timezone
 
 @router.post("/{teacher_id}/availability", response_model=AvailabilityResponse, status_code=status.HTTP_201_CREATED)
-def create_availability(
+async def create_availability(
     teacher_id: int,
     availability_data: AvailabilityCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_user: User = Depends(get_teacher)
 ):
     if current_user.id != teacher_id:
@@ -67,6 +176,8 @@ def create_availability(
             detail="Cannot create availability in the past"
         )
 
+    await AvailabilityService.ensure_no_overlap(db, teacher_id, start_time_utc, end_time_utc)
+
     availability = Availability(
         teacher_id=teacher_id,
         start_time=start_time_utc,
@@ -74,19 +185,48 @@ def create_availability(
         is_booked=False
     )
     db.add(availability)
-    db.commit()
-    db.refresh(availability)
+    await ChangeTracker.bump(db, TEACHER_AVAILABILITY, teacher_id)
+    await UtilizationService.slots_changed(db, teacher_id, [(start_time_utc, end_time_utc)])
+    await AvailabilityService.commit_slots(db)
+    await db.refresh(availability)
+    await slot_events.publish(teacher_id, SLOT_CREATED, slot_payload(availability))
     return availability
 
 
+@router.post("/{teacher_id}/availability/bulk", response_model=AvailabilityBulkResponse, status_code=status.HTTP_201_CREATED)
+async def create_availability_bulk(
+    teacher_id: int,
+    bulk_data: AvailabilityBulkCreate,
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(get_teacher)
+):
+    if current_user.id != teacher_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot create availability for another teacher"
+        )
+
+    result = await AvailabilityService.create_bulk(db, teacher_id, bulk_data)
+    for item in result.results:
+        if item.created:
+            await slot_events.publish(teacher_id, SLOT_CREATED, {
+                "id": item.id,
+                "teacher_id": teacher_id,
+                "start_time": item.start_time.isoformat(),
+                "end_time": item.end_time.isoformat(),
+                "is_booked": False,
+            })
+    return result
+
+
 @router.put("/availability/{availability_id}", response_model=AvailabilityResponse)
-def update_availability(
+async def update_availability(
     availability_id: int,
     availability_data: AvailabilityUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_user: User = Depends(get_teacher)
 ):
-    availability = db.query(Availability).filter(Availability.id == availability_id).first()
+    availability = await db.get(Availability, availability_id)
     if not availability:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -105,6 +245,7 @@ def update_availability(
             detail="Cannot update a booked slot"
         )
     
+    previous_slot = (availability.start_time, availability.end_time)
     if availability_data.start_time:
         availability.start_time = availability_data.start_time
     if availability_data.end_time:
@@ -115,19 +256,27 @@ def update_availability(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="End time must be after start time"
         )
+
+    await AvailabilityService.ensure_no_overlap(
+        db, availability.teacher_id, availability.start_time, availability.end_time, exclude_id=availability.id
+    )
+    await ChangeTracker.bump(db, TEACHER_AVAILABILITY, availability.teacher_id)
+    await UtilizationService.slots_changed(db, availability.teacher_id, [previous_slot], sign=-1)
+    await UtilizationService.slots_changed(db, availability.teacher_id, [(availability.start_time, availability.end_time)])
     
-    db.commit()
-    db.refresh(availability)
+    await AvailabilityService.commit_slots(db)
+    await db.refresh(availability)
+    await slot_events.publish(availability.teacher_id, SLOT_UPDATED, slot_payload(availability))
     return availability
 
 
 @router.delete("/availability/{availability_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_availability(
+async def delete_availability(
     availability_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_user: User = Depends(get_teacher)
 ):
-    availability = db.query(Availability).filter(Availability.id == availability_id).first()
+    availability = await db.get(Availability, availability_id)
     if not availability:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -146,5 +295,10 @@ def delete_availability(
             detail="Cannot delete a booked slot"
         )
     
-    db.delete(availability)
-    db.commit()
+    await db.delete(availability)
+    await ChangeTracker.bump(db, TEACHER_AVAILABILITY, availability.teacher_id)
+    await UtilizationService.slots_changed(
+        db, availability.teacher_id, [(availability.start_time, availability.end_time)], sign=-1
+    )
+    await db.commit()
+    await slot_events.publish(availability.teacher_id, SLOT_DELETED, {"id": availability_id, "teacher_id": availability.teacher_id})
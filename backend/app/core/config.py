@@ -1,12 +1,84 @@
 from pydantic_settings import BaseSettings
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:////app/db/timetable.db"  # абсолютный путь внутри контейнера
+    # Реплика для GET-запросов; пусто — все запросы в DATABASE_URL
+    DATABASE_REPLICA_URL: Optional[str] = None
+    # После своей записи пользователь столько секунд читает из основной БД
+    READ_YOUR_WRITES_SECONDS: float = 5.0
     SECRET_KEY: str = "supersecretkey"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Отзыв токенов: фильтр Блума в памяти перед таблицей token_revocations
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5.0
+    TOKEN_REVOCATION_PRUNE_SECONDS: float = 3600.0
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    # Кэш пользователей сбрасывается только в своем процессе: другие воркеры
+    # видят смену роли или удаление пользователя не позже чем через столько секунд
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TEACHER_DIRECTORY_CACHE_TTL_SECONDS: int = 30
+    TEACHER_DIRECTORY_CACHE_MAX_SIZE: int = 1000
+    TEACHER_DIRECTORY_MAX_AGE: int = 0
+    AVAILABILITY_ETAG_WINDOW_SECONDS: int = 60
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 256
+    # SQLite: прагмы применяются к каждому новому соединению
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -65536  # отрицательное значение — в КиБ
+    # PostgreSQL: пул соединений на каждый процесс
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Почта: без SMTP_HOST письма выводятся в консоль
+    SMTP_HOST: Optional[str] = None
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_USE_TLS: bool = False
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    MAIL_FROM: str = "noreply@timetable.local"
+    # Диспетчер outbox
+    OUTBOX_DISPATCHER_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_SECONDS: float = 2.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: float = 5.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 3600.0
+    OUTBOX_LEASE_SECONDS: float = 300.0
+    # Сколько дней хранить отправленные и окончательно неотправленные письма
+    OUTBOX_SENT_RETENTION_DAYS: int = 7
+    OUTBOX_FAILED_RETENTION_DAYS: int = 30
+    OUTBOX_PRUNE_SECONDS: float = 3600.0
+    # Отмена бронирований, не подтвержденных за PENDING_BOOKING_MAX_AGE_SECONDS
+    BOOKING_SWEEPER_ENABLED: bool = True
+    PENDING_BOOKING_MAX_AGE_SECONDS: float = 172800.0
+    BOOKING_SWEEP_BATCH_SIZE: int = 100
+    BOOKING_SWEEP_INTERVAL_SECONDS: float = 60.0
+    # Архив: слоты, начавшиеся раньше ARCHIVE_AFTER_DAYS дней назад, и их бронирования
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_POLICY: Literal["archive", "delete"] = "archive"
+    ARCHIVE_BATCH_SIZE: int = 1000
+    # События слотов: без PUBSUB_HUB_URL рассылка только внутри процесса
+    PUBSUB_HUB_URL: Optional[str] = None
+    SLOT_EVENTS_QUEUE_SIZE: int = 100
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    # Выгрузка: строк в одной пачке серверного курсора
+    EXPORT_BATCH_SIZE: int = 1000
+    # Метрики /metrics и лог медленных запросов (0 — не писать)
+    METRICS_ENABLED: bool = True
+    SLOW_REQUEST_THRESHOLD_MS: int = 500
+    SLOW_REQUEST_MAX_STATEMENTS: int = 50
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,129 @@
+"""Метрики HTTP-запросов и SQL для эндпоинта /metrics.
+
+MetricsMiddleware считает задержку, размер ответа и число запросов в
+обработке по шаблону маршрута. События движка SQLAlchemy складывают число
+SQL-запросов и время в БД в статистику текущего HTTP-запроса, которая
+живет в contextvar. Медленные запросы пишутся в лог вместе с выполненным
+SQL (без параметров).
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.utils.metrics import COUNT_BUCKETS, SIZE_BUCKETS, Counter, Gauge, Histogram, Registry
+
+logger = logging.getLogger(__name__)
+
+registry = Registry()
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+HTTP_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+))
+HTTP_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "HTTP requests being processed"))
+HTTP_RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS
+))
+REQUEST_DB_QUERIES = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("method", "route"), COUNT_BUCKETS
+))
+REQUEST_DB_TIME = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in the database per HTTP request", ("method", "route")
+))
+DB_QUERIES = registry.register(Counter("db_queries_total", "SQL statements executed, including background tasks"))
+DB_TIME = registry.register(Counter("db_query_duration_seconds_total", "Time spent executing SQL statements"))
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: List[Tuple[str, float]] = []
+
+
+# Объект изменяется на месте: гринлеты SQLAlchemy разделяют контекст задачи
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    DB_QUERIES.inc()
+    DB_TIME.inc(amount=elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+        if len(stats.statements) < settings.SLOW_REQUEST_MAX_STATEMENTS:
+            stats.statements.append((statement, elapsed))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Подключает счетчики SQL к синхронному движку (для async — engine.sync_engine)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: без BaseHTTPMiddleware, чтобы не добавлять задачу на каждый запрос."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            self._record(scope, response, stats, elapsed)
+
+    def _record(self, scope, response: dict, stats: RequestStats, elapsed: float) -> None:
+        method = scope["method"]
+        # Шаблон пути, а не сам путь: иначе у метрик будет неограниченное число меток
+        route = getattr(scope.get("route"), "path", "unmatched")
+        HTTP_REQUESTS.inc(method, route, str(response["status"]))
+        HTTP_LATENCY.observe(elapsed, method, route)
+        HTTP_RESPONSE_SIZE.observe(response["size"], method, route)
+        REQUEST_DB_QUERIES.observe(stats.queries, method, route)
+        REQUEST_DB_TIME.observe(stats.db_time, method, route)
+
+        threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+        if threshold and elapsed * 1000 >= threshold:
+            statements = "".join(
+                f"\n  [{duration * 1000:.1f} ms] {' '.join(statement.split())}" for statement, duration in stats.statements
+            )
+            logger.warning(
+                "Медленный запрос %s %s -> %s: %.1f ms, SQL: %d запросов, %.1f ms%s",
+                method, scope["path"], response["status"], elapsed * 1000, stats.queries, stats.db_time * 1000, statements,
+            )
@@ -1,8 +1,16 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Callable, Optional, Union
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.instrumentation import registry
+from app.utils.metrics import Observed
+import asyncio
+import threading
+import time
+import uuid
 import bcrypt
 
 def get_password_hash(password: str) -> str:
@@ -16,18 +24,116 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_bytes, hashed_password.encode("utf-8"))
 
 
+class PasswordHasher:
+    """Выполняет bcrypt в отдельном ограниченном пуле потоков.
+
+    bcrypt освобождает GIL, поэтому потоков достаточно. Пул не делит потоки
+    с обработчиками запросов, а очередь ограничена: при переполнении запрос
+    сразу получает 503, а не ждет вместе с остальным API.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def _submit(self, func: Callable, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Сервер перегружен, повторите попытку позже"
+                )
+            self._pending += 1
+        submitted_at = time.perf_counter()
+
+        def job():
+            waited = time.perf_counter() - submitted_at
+            with self._lock:
+                self._running += 1
+                self._wait_seconds += waited
+                self._max_wait_seconds = max(self._max_wait_seconds, waited)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        try:
+            return await asyncio.wrap_future(self._executor.submit(job))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": self._wait_seconds / self._completed if self._completed else 0.0,
+                "max_wait_seconds": self._max_wait_seconds,
+            }
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+registry.register(Observed(
+    "password_hash_running", "Password hash jobs running", "gauge",
+    lambda: password_hasher.stats()["running"]
+))
+registry.register(Observed(
+    "password_hash_queued", "Password hash jobs waiting for a worker", "gauge",
+    lambda: password_hasher.stats()["queued"]
+))
+registry.register(Observed(
+    "password_hash_completed_total", "Password hash jobs completed", "counter",
+    lambda: password_hasher.stats()["completed"]
+))
+registry.register(Observed(
+    "password_hash_rejected_total", "Password hash jobs rejected because the queue was full", "counter",
+    lambda: password_hasher.stats()["rejected"]
+))
+registry.register(Observed(
+    "password_hash_max_wait_seconds", "Longest password hash queue wait", "gauge",
+    lambda: password_hasher.stats()["max_wait_seconds"]
+))
+
+
+
+def _token_claims() -> dict:
+    # jti — для отзыва конкретного токена, дробный iat — для отзыва всех токенов, выпущенных до момента
+    return {"jti": uuid.uuid4().hex, "iat": time.time()}
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", **_token_claims()})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
 def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", **_token_claims()})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
@@ -1,11 +1,39 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import auth, teachers, bookings, students
+from app.api.deps import LAST_WRITE_HEADER
+from app.api.routes import admin, auth, availability, teachers, bookings, students
+from app.core.config import settings
+from app.core.database import async_engine, engine, replica_engine
+from app.core.instrumentation import MetricsMiddleware, instrument_engine, registry
+from app.services.booking_sweeper import booking_sweeper
+from app.services.outbox_dispatcher import outbox_dispatcher
+from app.services.slot_events import slot_events
+from app.services.token_revocation import token_revocations
+from app.utils.metrics import CONTENT_TYPE
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox_dispatcher.start()
+    if settings.BOOKING_SWEEPER_ENABLED:
+        booking_sweeper.start()
+    slot_events.start()
+    token_revocations.start()
+    yield
+    await token_revocations.stop()
+    await slot_events.stop()
+    await booking_sweeper.stop()
+    await outbox_dispatcher.stop()
+
 
 app = FastAPI(
     title="Менеджер по расписанию учителей",
     description="API для управления расписаниями преподавателей и бронированием мест для студентов",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -14,14 +42,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", LAST_WRITE_HEADER],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(async_engine.sync_engine)
+    instrument_engine(engine)
+    if replica_engine is not async_engine:
+        instrument_engine(replica_engine.sync_engine)
+
 app.include_router(auth.router)
 app.include_router(teachers.router)
 app.include_router(bookings.router)
 app.include_router(students.router)
+app.include_router(availability.router)
+app.include_router(admin.router)
 
 
 @app.get("/health")
 def health_check():
     return {"status": "OK"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,40 @@
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, Enum as SQLEnum
+from app.core.database import Base
+from app.models.booking import BookingStatus
+
+
+class AvailabilityArchive(Base):
+    """Прошедший слот, перенесенный из availabilities; id сохраняется."""
+
+    __tablename__ = "availabilities_archive"
+    __table_args__ = (
+        # Выгрузка и история слотов преподавателя
+        Index("ix_availabilities_archive_teacher_start", "teacher_id", "start_time"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    is_booked = Column(Boolean, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
+
+
+class BookingArchive(Base):
+    """Завершенное или отмененное бронирование прошедшего слота.
+
+    Время слота хранится в самой строке: слот может быть уже в
+    availabilities_archive, поэтому внешнего ключа на него нет.
+    """
+
+    __tablename__ = "bookings_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    availability_id = Column(Integer, nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(SQLEnum(BookingStatus), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
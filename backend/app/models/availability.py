@@ -1,10 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index, event, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
 class Availability(Base):
     __tablename__ = "availabilities"
+    __table_args__ = (
+        # Покрывает выборку свободных будущих слотов преподавателя
+        Index("ix_availabilities_teacher_booked_start", "teacher_id", "is_booked", "start_time"),
+        # Поиск соседнего слота при проверке пересечений
+        Index("ix_availabilities_teacher_start", "teacher_id", "start_time"),
+        # Поиск ближайших свободных слотов по всем преподавателям
+        Index("ix_availabilities_booked_start", "is_booked", "start_time"),
+        # id не переиспользуются: прошедшие слоты уходят в архив с тем же id
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -14,3 +24,51 @@ class Availability(Base):
 
     teacher = relationship("User", back_populates="availabilities")
     booking = relationship("Booking", back_populates="availability", uselist=False)
+
+
+# Слоты одного преподавателя не пересекаются — это проверяется и в самой БД,
+# чтобы две параллельные записи не прошли проверку в приложении одновременно.
+# SQLite: триггеры выполняются под блокировкой записи, поэтому проверка и
+# вставка сериализованы. Раз пересечений нет, достаточно сравнить новый слот
+# с последним слотом, начинающимся до его конца (один поиск по индексу).
+_SQLITE_OVERLAP_CHECK = (
+    "(SELECT end_time FROM availabilities WHERE teacher_id = NEW.teacher_id "
+    "AND start_time < NEW.end_time AND id IS NOT NEW.id "
+    "ORDER BY start_time DESC LIMIT 1) > NEW.start_time"
+)
+SLOT_OVERLAP_MESSAGE = "Availability overlaps an existing slot"
+SQLITE_OVERLAP_GUARD_DDL = (
+    "CREATE TRIGGER IF NOT EXISTS availabilities_no_overlap_insert BEFORE INSERT ON availabilities "
+    f"WHEN {_SQLITE_OVERLAP_CHECK} BEGIN SELECT RAISE(ABORT, '{SLOT_OVERLAP_MESSAGE}'); END",
+    "CREATE TRIGGER IF NOT EXISTS availabilities_no_overlap_update "
+    "BEFORE UPDATE OF teacher_id, start_time, end_time ON availabilities "
+    f"WHEN {_SQLITE_OVERLAP_CHECK} BEGIN SELECT RAISE(ABORT, '{SLOT_OVERLAP_MESSAGE}'); END",
+)
+# PostgreSQL: ограничение-исключение по полуинтервалам [start_time, end_time)
+POSTGRESQL_OVERLAP_GUARD_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "DO $$ BEGIN "
+    "IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ex_availabilities_teacher_overlap') THEN "
+    "ALTER TABLE availabilities ADD CONSTRAINT ex_availabilities_teacher_overlap "
+    "EXCLUDE USING gist (teacher_id WITH =, tsrange(start_time, end_time) WITH &&); "
+    "END IF; END $$",
+)
+
+
+def install_overlap_guard(connection) -> None:
+    """Запрещает пересечение слотов на уровне БД; идемпотентно.
+
+    В существующей БД сначала уберите пересечения (remove_overlapping_slots),
+    иначе PostgreSQL не создаст ограничение.
+    """
+    statements = {
+        "sqlite": SQLITE_OVERLAP_GUARD_DDL,
+        "postgresql": POSTGRESQL_OVERLAP_GUARD_DDL,
+    }.get(connection.dialect.name, ())
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Availability.__table__, "after_create")
+def _create_overlap_guard(target, connection, **kw) -> None:
+    install_overlap_guard(connection)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer,  DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer,  DateTime, ForeignKey, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import relationship
 import enum
 from app.core.database import Base
@@ -12,11 +12,25 @@ class BookingStatus(str, enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Не больше одного активного бронирования на слот
+        Index(
+            "ux_bookings_active_availability", "availability_id", unique=True,
+            sqlite_where=text("status != 'cancelled'"),
+            postgresql_where=text("status != 'cancelled'")
+        ),
+        # Выборка просроченных неподтвержденных бронирований
+        Index("ix_bookings_status_created", "status", "created_at"),
+        # Проверка, что у прошедшего слота не осталось бронирований, перед архивацией
+        Index("ix_bookings_availability", "availability_id"),
+        # id не переиспользуются: завершенные бронирования уходят в архив с тем же id
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     availability_id = Column(Integer, ForeignKey("availabilities.id"), nullable=False)
-    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     status = Column(SQLEnum(BookingStatus), default=BookingStatus.pending, nullable=False)
     created_at = Column(DateTime, nullable=False)
 
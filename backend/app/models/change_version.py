@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+
+class ChangeVersion(Base):
+    """Счетчик изменений списка: слотов преподавателя или бронирований пользователя."""
+
+    __tablename__ = "change_versions"
+
+    scope = Column(String(32), primary_key=True)
+    key = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
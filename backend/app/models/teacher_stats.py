@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer
+from app.core.database import Base
+
+
+class TeacherDailyStats(Base):
+    """Суточные итоги преподавателя по дню начала слота (UTC).
+
+    Все поля — счетчики, которые изменяются на дельту в транзакции
+    изменения слота или бронирования, поэтому отчет читает O(дней), а не
+    всю историю.
+    """
+
+    __tablename__ = "teacher_daily_stats"
+    __table_args__ = (
+        # Отчет по всем преподавателям за период
+        Index("ix_teacher_daily_stats_day", "day"),
+    )
+
+    teacher_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    slots_offered = Column(Integer, nullable=False, default=0)
+    offered_seconds = Column(Integer, nullable=False, default=0)
+    # Длительность слотов с активным (не отмененным) бронированием
+    booked_seconds = Column(Integer, nullable=False, default=0)
+    bookings_created = Column(Integer, nullable=False, default=0)
+    bookings_confirmed = Column(Integer, nullable=False, default=0)
+    bookings_cancelled = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from app.core.database import Base
+
+
+class TokenRevocation(Base):
+    """Отозванный токен (jti) или все токены пользователя, выпущенные до revoked_at (jti пустой).
+
+    Строка нужна только до expires_at: позже отозванные токены истекают сами.
+    """
+
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(32), nullable=True, unique=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
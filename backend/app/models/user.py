@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Index, Enum as SQLEnum, event, text
 from sqlalchemy.orm import relationship
 import enum
 from app.core.database import Base
@@ -12,6 +12,13 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Поиск по имени в каталоге преподавателей на PostgreSQL (pg_trgm)
+        Index(
+            "ix_users_full_name_trgm", "full_name",
+            postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -22,3 +29,35 @@ class User(Base):
     availabilities = relationship("Availability", back_populates="teacher", cascade="all, delete-orphan")
     teacher_bookings = relationship("Booking", foreign_keys="Booking.teacher_id", back_populates="teacher")
     student_bookings = relationship("Booking", foreign_keys="Booking.student_id", back_populates="student")
+
+
+# Поиск по имени на SQLite: FTS5-таблица, синхронизируемая триггерами
+SQLITE_NAME_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(full_name, content='users', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, full_name) VALUES (new.id, new.full_name); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, full_name) VALUES ('delete', old.id, old.full_name); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF full_name ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, full_name) VALUES ('delete', old.id, old.full_name); "
+    "INSERT INTO users_fts(rowid, full_name) VALUES (new.id, new.full_name); END",
+    "INSERT INTO users_fts(users_fts) VALUES ('rebuild')",
+)
+
+
+def install_name_search(connection) -> None:
+    """Создает индекс поиска по имени; идемпотентно, подходит и для существующей БД."""
+    if connection.dialect.name == "sqlite":
+        for statement in SQLITE_NAME_SEARCH_DDL:
+            connection.execute(text(statement))
+
+
+@event.listens_for(Base.metadata, "before_create")
+def _create_trgm_extension(target, connection, **kw) -> None:
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+@event.listens_for(User.__table__, "after_create")
+def _create_name_search(target, connection, **kw) -> None:
+    install_name_search(connection)
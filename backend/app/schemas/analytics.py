@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import date
+
+
+class TeacherWeekUtilization(BaseModel):
+    teacher_id: int
+    teacher_name: str
+    week_start: date
+    offered_hours: float
+    booked_hours: float
+    utilization: float
+    slots_offered: int
+    bookings: int
+    confirmed: int
+    cancelled: int
+    confirmation_rate: float
+    cancellation_rate: float
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from datetime import date, datetime, time
+from typing import List, Optional
 
 
 class AvailabilityBase(BaseModel):
@@ -24,3 +24,55 @@ class AvailabilityResponse(AvailabilityBase):
 
     class Config:
         from_attributes = True
+
+
+class AvailabilityRecurrence(BaseModel):
+    weekdays: List[int] = Field(..., min_length=1, description="Дни недели: 0 — понедельник, 6 — воскресенье")
+    start_time: time
+    end_time: time
+    start_date: date
+    until: date
+
+    @field_validator("weekdays")
+    @classmethod
+    def check_weekdays(cls, value: List[int]) -> List[int]:
+        if any(day < 0 or day > 6 for day in value):
+            raise ValueError("Дни недели должны быть от 0 до 6")
+        return sorted(set(value))
+
+
+class AvailabilityBulkCreate(BaseModel):
+    slots: List[AvailabilityCreate] = []
+    recurrence: Optional[AvailabilityRecurrence] = None
+
+
+class AvailabilityBulkResult(AvailabilityBase):
+    id: Optional[int] = None
+    created: bool
+    error: Optional[str] = None
+
+
+class AvailabilityBulkResponse(BaseModel):
+    created: int
+    rejected: int
+    results: List[AvailabilityBulkResult]
+
+
+class FreeSlotResponse(AvailabilityResponse):
+    teacher_name: str
+
+
+class TeacherScheduleColumns(BaseModel):
+    """Слоты преподавателя по столбцам: i-й элемент каждого списка — один слот."""
+    teacher_id: int
+    teacher_name: str
+    slot_ids: List[int]
+    starts: List[int] = Field(..., description="Начало слота, Unix-время UTC в секундах")
+    ends: List[int] = Field(..., description="Конец слота, Unix-время UTC в секундах")
+    booked: List[bool]
+
+
+class ScheduleGridResponse(BaseModel):
+    start: datetime
+    end: datetime
+    teachers: List[TeacherScheduleColumns]
@@ -40,7 +40,18 @@ class TokenRefresh(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
+
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
     exp: Optional[int] = None
     type: Optional[str] = None
+    jti: Optional[str] = None
+    iat: Optional[float] = None
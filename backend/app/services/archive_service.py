@@ -0,0 +1,192 @@
+"""Перенос прошедших слотов и бронирований из рабочих таблиц в архив.
+
+В availabilities и bookings остаются будущие слоты, недавнее прошлое и
+бронирования, ожидающие подтверждения. Слоты, начавшиеся раньше
+ARCHIVE_AFTER_DAYS дней назад, и их подтвержденные или отмененные
+бронирования переносятся в availabilities_archive и bookings_archive
+(политика archive) или удаляются (delete) — пачками по ARCHIVE_BATCH_SIZE,
+каждая в своей транзакции. Запуск, например, раз в сутки из cron:
+
+    python -m app.services.archive_service
+    python -m app.services.archive_service --policy delete --days 365 --vacuum
+"""
+import argparse
+import asyncio
+from sqlalchemy import DateTime, delete, exists, func, insert, literal, select, text
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.archive import AvailabilityArchive, BookingArchive
+from app.models.availability import Availability, install_overlap_guard
+from app.models.booking import Booking, BookingStatus
+from app.services.change_tracker import USER_BOOKINGS, ChangeTracker
+from datetime import datetime, timedelta
+from typing import Tuple
+
+ARCHIVE = "archive"
+DELETE = "delete"
+
+
+class ArchiveService:
+    @staticmethod
+    async def archive_bookings(db: AsyncSession, cutoff: datetime, batch_size: int, policy: str = ARCHIVE) -> int:
+        """Одна пачка бронирований слотов, начавшихся до cutoff; возвращает их число."""
+        batch = (await db.execute(
+            select(Booking.id, Booking.student_id, Booking.teacher_id).join(
+                Availability, Availability.id == Booking.availability_id
+            ).where(
+                Availability.start_time < cutoff,
+                Booking.status != BookingStatus.pending
+            ).order_by(Booking.id).limit(batch_size).with_for_update(of=Booking, skip_locked=True)
+        )).all()
+        if not batch:
+            return 0
+        ids = [row.id for row in batch]
+
+        if policy == ARCHIVE:
+            await db.execute(insert(BookingArchive).from_select(
+                ["id", "availability_id", "student_id", "teacher_id", "status", "created_at",
+                 "start_time", "end_time", "archived_at"],
+                select(
+                    Booking.id, Booking.availability_id, Booking.student_id, Booking.teacher_id,
+                    Booking.status, Booking.created_at, Availability.start_time, Availability.end_time,
+                    literal(datetime.utcnow(), DateTime)
+                ).join(Availability, Availability.id == Booking.availability_id).where(Booking.id.in_(ids))
+            ))
+        else:
+            # История пользователей изменилась — сбрасываем ETag списков
+            await ChangeTracker.bump(db, USER_BOOKINGS, *(
+                user_id for row in batch for user_id in (row.student_id, row.teacher_id)
+            ))
+        await db.execute(delete(Booking).where(Booking.id.in_(ids)))
+        await db.commit()
+        return len(ids)
+
+    @staticmethod
+    async def archive_slots(db: AsyncSession, cutoff: datetime, batch_size: int, policy: str = ARCHIVE) -> int:
+        """Одна пачка слотов, начавшихся до cutoff, на которые не осталось бронирований."""
+        ids = (await db.scalars(
+            select(Availability.id).where(
+                Availability.start_time < cutoff,
+                ~exists().where(Booking.availability_id == Availability.id)
+            ).order_by(Availability.id).limit(batch_size).with_for_update(skip_locked=True)
+        )).all()
+        if not ids:
+            return 0
+
+        if policy == ARCHIVE:
+            await db.execute(insert(AvailabilityArchive).from_select(
+                ["id", "teacher_id", "start_time", "end_time", "is_booked", "archived_at"],
+                select(
+                    Availability.id, Availability.teacher_id, Availability.start_time, Availability.end_time,
+                    Availability.is_booked, literal(datetime.utcnow(), DateTime)
+                ).where(Availability.id.in_(ids))
+            ))
+        await db.execute(delete(Availability).where(Availability.id.in_(ids)))
+        await db.commit()
+        return len(ids)
+
+    @staticmethod
+    async def run(
+        cutoff: datetime,
+        batch_size: int = settings.ARCHIVE_BATCH_SIZE,
+        policy: str = settings.ARCHIVE_POLICY,
+        session_factory=AsyncSessionLocal
+    ) -> Tuple[int, int]:
+        """Переносит все подходящие строки; сначала бронирования, затем освободившиеся слоты."""
+        totals = []
+        for archive_batch in (ArchiveService.archive_bookings, ArchiveService.archive_slots):
+            total = 0
+            while True:
+                async with session_factory() as db:
+                    count = await archive_batch(db, cutoff, batch_size, policy)
+                total += count
+                if count < batch_size:
+                    break
+            totals.append(total)
+        return totals[0], totals[1]
+
+
+def enable_sqlite_autoincrement(connection) -> None:
+    """Пересоздает availabilities и bookings с AUTOINCREMENT в SQLite-базах, созданных без него.
+
+    Без AUTOINCREMENT SQLite выдает новой строке max(id) + 1, и после
+    удаления последней строки id может совпасть с уже перенесенным в архив.
+    Счетчик новой таблицы начинается не ниже наибольшего id в архиве.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for table, archive in (
+        (Availability.__table__, AvailabilityArchive.__table__),
+        (Booking.__table__, BookingArchive.__table__),
+    ):
+        sql = connection.scalar(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+        )
+        if sql is None or "AUTOINCREMENT" in sql.upper():
+            continue
+        new_name = f"{table.name}_new"
+        ddl = str(CreateTable(table).compile(dialect=connection.dialect)).strip()
+        columns = ", ".join(column.name for column in table.columns)
+        connection.execute(text(ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {new_name} ", 1)))
+        connection.execute(text(f"INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {table.name}"))
+        connection.execute(text(f"DROP TABLE {table.name}"))
+        connection.execute(text(f"ALTER TABLE {new_name} RENAME TO {table.name}"))
+        for index in table.indexes:
+            index.create(connection)
+        if table is Availability.__table__:
+            # Триггеры удаляются вместе с таблицей
+            install_overlap_guard(connection)
+
+        floor = connection.scalar(select(func.max(archive.c.id))) or 0
+        connection.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+        connection.execute(
+            text("INSERT INTO sqlite_sequence (name, seq) SELECT :name, max(coalesce(max(id), 0), :floor) FROM "
+                 + table.name),
+            {"name": table.name, "floor": floor}
+        )
+
+
+def vacuum() -> None:
+    """Возвращает освободившееся место: SQLite пересобирает файл, PostgreSQL — VACUUM ANALYZE таблиц."""
+    from app.core.database import engine
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.dialect.name == "sqlite":
+            connection.exec_driver_sql("VACUUM")
+        else:
+            connection.exec_driver_sql("VACUUM ANALYZE availabilities, bookings")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--policy", choices=[ARCHIVE, DELETE], default=settings.ARCHIVE_POLICY)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--vacuum", action="store_true", help="сжать таблицы после переноса")
+    args = parser.parse_args()
+
+    from app.core.database import Base, create_missing_indexes, engine
+    from app.models import user  # noqa: F401  (внешние ключи на users)
+    from app.services.booking_service import cancel_duplicate_bookings
+
+    # Таблицы и индексы для баз, созданных до появления архива
+    Base.metadata.create_all(bind=engine, tables=[AvailabilityArchive.__table__, BookingArchive.__table__])
+    with engine.begin() as connection:
+        enable_sqlite_autoincrement(connection)
+        cancelled = cancel_duplicate_bookings(connection)
+    if cancelled:
+        print(f"{cancelled} duplicate active bookings cancelled")
+    create_missing_indexes(engine)
+
+    cutoff = datetime.utcnow() - timedelta(days=args.days)
+    bookings, slots = asyncio.run(ArchiveService.run(cutoff, args.batch_size, args.policy))
+    action = "archived" if args.policy == ARCHIVE else "deleted"
+    print(f"before {cutoff.isoformat()}: {bookings} bookings and {slots} slots {action}")
+    if args.vacuum:
+        vacuum()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,56 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from app.models.user import User, UserRole
-from app.schemas.user import UserCreate, UserLogin, Token
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from app.schemas.user import PasswordChange, UserCreate, UserLogin, Token, TokenPayload
+from app.core.security import password_hasher, create_access_token, create_refresh_token
+from app.services.token_revocation import token_revocations
+from app.utils.jwt import verify_token
 from typing import Optional
 
 
 class AuthService:
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> User:
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+        user = await db.scalar(select(User).where(User.email == email))
+        # Возвращаем соединение в пул до хеширования пароля
+        await db.close()
+        return user
+
+    @staticmethod
+    async def save_user(db: AsyncSession, user: User) -> User:
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        return user
+
+    # Хеширование выполняется в пуле password_hasher, а запросы к БД —
+    # асинхронно, поэтому цикл событий не блокируется
+    @staticmethod
+    async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
+        existing_user = await AuthService.get_user_by_email(db, user_data.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
         db_user = User(
             email=user_data.email,
             full_name=user_data.full_name,
             hashed_password=hashed_password,
             role=user_data.role or UserRole.student
         )
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        return db_user
+        return await AuthService.save_user(db, db_user)
 
     @staticmethod
-    def authenticate_user(db: Session, login_data: UserLogin) -> Optional[User]:
-        user = db.query(User).filter(User.email == login_data.email).first()
+    async def authenticate_user(db: AsyncSession, login_data: UserLogin) -> Optional[User]:
+        user = await AuthService.get_user_by_email(db, login_data.email)
         if not user:
             return None
-        if not verify_password(login_data.password, user.hashed_password):
+        if not await password_hasher.verify(login_data.password, user.hashed_password):
             return None
         return user
 
@@ -45,3 +62,69 @@ class AuthService:
             access_token=access_token,
             refresh_token=refresh_token
         )
+
+    @staticmethod
+    async def rotate_refresh_token(db: AsyncSession, refresh_token: str) -> Token:
+        """Refresh-токен одноразовый: он отзывается, взамен выдается новая пара."""
+        token_data = verify_token(refresh_token, "refresh")
+        if not token_data or not token_data.sub or not token_data.jti:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Недопустимый refresh токен"
+            )
+
+        if await token_revocations.is_revoked(db, token_data):
+            if not token_revocations.user_revoked(token_data):
+                # Повторное использование уже замененного токена: вероятно, он украден,
+                # поэтому отзываем все токены пользователя
+                revocation = token_revocations.revoke_user(db, token_data.sub)
+                await db.commit()
+                token_revocations.remember(revocation)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh токен отозван"
+            )
+
+        revocation = token_revocations.revoke(db, token_data)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Тот же токен одновременно обменян другим запросом
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh токен отозван"
+            )
+        token_revocations.remember(revocation)
+        return AuthService.create_tokens(token_data.sub)
+
+    @staticmethod
+    async def logout(db: AsyncSession, access_token: TokenPayload, refresh_token: Optional[str] = None) -> None:
+        """Отзывает текущий access-токен и, если передан, refresh-токен того же пользователя."""
+        revocations = [token_revocations.revoke(db, access_token)] if access_token.jti else []
+        refresh_data = verify_token(refresh_token, "refresh") if refresh_token else None
+        if (refresh_data and refresh_data.jti and refresh_data.sub == access_token.sub
+                and not await token_revocations.token_revoked(db, refresh_data.jti)):
+            revocations.append(token_revocations.revoke(db, refresh_data))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Токен уже отозван параллельным запросом
+            await db.rollback()
+            return
+        token_revocations.remember(*revocations)
+
+    @staticmethod
+    async def change_password(db: AsyncSession, user_id: int, password_data: PasswordChange) -> Token:
+        """Меняет пароль, отзывает все выданные ранее токены и возвращает новую пару."""
+        user = await db.get(User, user_id)
+        if not user or not await password_hasher.verify(password_data.current_password, user.hashed_password):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Incorrect password"
+            )
+        user.hashed_password = await password_hasher.hash(password_data.new_password)
+        revocation = token_revocations.revoke_user(db, user_id)
+        await db.commit()
+        token_revocations.remember(revocation)
+        return AuthService.create_tokens(user_id)
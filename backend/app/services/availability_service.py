@@ -0,0 +1,315 @@
+from itertools import groupby
+from sqlalchemy import and_, delete, exists, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from app.models.availability import SLOT_OVERLAP_MESSAGE, Availability
+from app.models.booking import Booking
+from app.models.user import User, UserRole
+from app.schemas.availability import (
+    AvailabilityBulkCreate, AvailabilityBulkResponse, AvailabilityBulkResult, AvailabilityRecurrence,
+    FreeSlotResponse, ScheduleGridResponse, TeacherScheduleColumns
+)
+from app.services.change_tracker import TEACHER_AVAILABILITY, ChangeTracker
+from app.services.utilization_service import UtilizationService
+from app.utils.intervals import IntervalSet, as_naive_utc
+from app.utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor
+from app.utils.serialization import ListSerializer
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+MAX_BULK_SLOTS = 1000
+
+free_slot_list = ListSerializer(FreeSlotResponse)
+
+
+class AvailabilityService:
+    @staticmethod
+    async def find_overlap(
+        db: AsyncSession,
+        teacher_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_id: Optional[int] = None
+    ) -> Optional[Availability]:
+        """Слот преподавателя, пересекающийся с [start_time, end_time), или None.
+
+        Слоты одного преподавателя не пересекаются (это гарантирует БД, см.
+        install_overlap_guard), поэтому достаточно взять последний слот,
+        начинающийся до end_time: один поиск по индексу (teacher_id,
+        start_time) вместо сканирования диапазона.
+        """
+        query = select(Availability).where(
+            Availability.teacher_id == teacher_id,
+            Availability.start_time < as_naive_utc(end_time)
+        )
+        if exclude_id is not None:
+            query = query.where(Availability.id != exclude_id)
+        previous = await db.scalar(query.order_by(Availability.start_time.desc()).limit(1))
+        if previous and as_naive_utc(previous.end_time) > as_naive_utc(start_time):
+            return previous
+        return None
+
+    @staticmethod
+    async def ensure_no_overlap(
+        db: AsyncSession,
+        teacher_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_id: Optional[int] = None
+    ) -> None:
+        if await AvailabilityService.find_overlap(db, teacher_id, start_time, end_time, exclude_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=SLOT_OVERLAP_MESSAGE
+            )
+
+    @staticmethod
+    async def commit_slots(db: AsyncSession) -> None:
+        """Фиксирует изменения слотов; пересечение, пойманное ограничением БД, — 400."""
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Параллельная запись прошла проверку раньше нас
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=SLOT_OVERLAP_MESSAGE
+            )
+
+    @staticmethod
+    def expand_recurrence(rule: AvailabilityRecurrence) -> List[Tuple[datetime, datetime]]:
+        """Разворачивает правило повторения в список интервалов до даты until включительно."""
+        if rule.until < rule.start_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Recurrence end date must not be before start date"
+            )
+        slots = []
+        day = rule.start_date
+        while day <= rule.until:
+            if day.weekday() in rule.weekdays:
+                slots.append((datetime.combine(day, rule.start_time), datetime.combine(day, rule.end_time)))
+                if len(slots) > MAX_BULK_SLOTS:
+                    break
+            day += timedelta(days=1)
+        return slots
+
+    @staticmethod
+    async def create_bulk(db: AsyncSession, teacher_id: int, data: AvailabilityBulkCreate) -> AvailabilityBulkResponse:
+        requested = [(slot.start_time, slot.end_time) for slot in data.slots]
+        if data.recurrence:
+            requested.extend(AvailabilityService.expand_recurrence(data.recurrence))
+        requested = [
+            (start_time.replace(tzinfo=timezone.utc), end_time.replace(tzinfo=timezone.utc))
+            for start_time, end_time in requested
+        ]
+
+        if not requested:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No slots to create"
+            )
+        if len(requested) > MAX_BULK_SLOTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many slots in one request (max {MAX_BULK_SLOTS})"
+            )
+
+        # Вся проверка — за один проход, вставка — одной транзакцией.
+        # Существующие слоты в окне пакета загружаются одним запросом по
+        # диапазону, после чего пересечения ищутся в памяти за O(log n)
+        window_start = min(start for start, _ in requested)
+        window_end = max(end for _, end in requested)
+        existing = await db.execute(select(Availability.start_time, Availability.end_time).where(
+            Availability.teacher_id == teacher_id,
+            Availability.start_time < as_naive_utc(window_end),
+            Availability.end_time > as_naive_utc(window_start)
+        ))
+        occupied = IntervalSet(existing.all())
+
+        now_utc = datetime.now(timezone.utc)
+        results: List[AvailabilityBulkResult] = []
+        pending: List[Tuple[AvailabilityBulkResult, Availability]] = []
+        for start_time_utc, end_time_utc in requested:
+            result = AvailabilityBulkResult(start_time=start_time_utc, end_time=end_time_utc, created=False)
+            results.append(result)
+
+            if start_time_utc >= end_time_utc:
+                result.error = "End time must be after start time"
+            elif start_time_utc < now_utc:
+                result.error = "Cannot create availability in the past"
+            elif not occupied.add(start_time_utc, end_time_utc):
+                result.error = SLOT_OVERLAP_MESSAGE
+            else:
+                pending.append((result, Availability(
+                    teacher_id=teacher_id,
+                    start_time=start_time_utc,
+                    end_time=end_time_utc,
+                    is_booked=False
+                )))
+
+        if pending:
+            db.add_all([availability for _, availability in pending])
+            await ChangeTracker.bump(db, TEACHER_AVAILABILITY, teacher_id)
+            await UtilizationService.slots_changed(
+                db, teacher_id, [(availability.start_time, availability.end_time) for _, availability in pending]
+            )
+            await AvailabilityService.commit_slots(db)
+            for result, availability in pending:
+                result.id = availability.id
+                result.created = True
+
+        return AvailabilityBulkResponse(
+            created=len(pending),
+            rejected=len(results) - len(pending),
+            results=results
+        )
+
+    @staticmethod
+    def duration_at_least(dialect: str, minutes: int):
+        """Условие «слот не короче minutes минут» для SQLite и PostgreSQL."""
+        if dialect == "sqlite":
+            length = (func.julianday(Availability.end_time) - func.julianday(Availability.start_time)) * 1440
+            # julianday — число с плавающей точкой, допускаем погрешность
+            return length >= minutes - 0.001
+        return Availability.end_time - Availability.start_time >= timedelta(minutes=minutes)
+
+    @staticmethod
+    async def search_free_slots(
+        db: AsyncSession,
+        window_from: datetime,
+        window_to: Optional[datetime] = None,
+        min_duration: Optional[int] = None,
+        teacher_ids: Optional[Sequence[int]] = None,
+        per_teacher: bool = False,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> List[FreeSlotResponse]:
+        """Ближайшие свободные слоты всех (или выбранных) преподавателей одним запросом.
+
+        Идет по индексу (is_booked, start_time) от начала окна и
+        останавливается на limit строках. С per_teacher возвращает только
+        ближайший слот каждого преподавателя: по одному поиску в индексе
+        (teacher_id, is_booked, start_time) на преподавателя.
+        """
+        conditions = [
+            Availability.is_booked == False,
+            Availability.start_time >= as_naive_utc(window_from),
+        ]
+        if window_to:
+            conditions.append(Availability.start_time < as_naive_utc(window_to))
+        if min_duration:
+            conditions.append(AvailabilityService.duration_at_least(db.bind.dialect.name, min_duration))
+        if teacher_ids:
+            conditions.append(Availability.teacher_id.in_(teacher_ids))
+
+        columns = (
+            Availability.id, Availability.teacher_id, Availability.start_time,
+            Availability.end_time, Availability.is_booked
+        )
+        if per_teacher:
+            first_slot = select(Availability.id).where(
+                Availability.teacher_id == User.id, *conditions
+            ).order_by(Availability.start_time, Availability.id).limit(1).correlate(User).scalar_subquery()
+            teachers = select(first_slot).where(User.role == UserRole.teacher)
+            if teacher_ids:
+                teachers = teachers.where(User.id.in_(teacher_ids))
+            slots = select(*columns).where(Availability.id.in_(teachers)).subquery()
+        else:
+            if cursor:
+                last_start, last_id = decode_cursor(cursor, datetime, int)
+                conditions.append(or_(
+                    Availability.start_time > last_start,
+                    and_(Availability.start_time == last_start, Availability.id > last_id)
+                ))
+            slots = select(*columns).where(*conditions).order_by(
+                Availability.start_time, Availability.id
+            ).limit(limit).subquery()
+
+        rows = await db.execute(
+            select(slots, User.full_name.label("teacher_name")).join(
+                User, User.id == slots.c.teacher_id
+            ).order_by(slots.c.start_time, slots.c.id).limit(limit)
+        )
+        return free_slot_list.from_rows(rows)
+
+    @staticmethod
+    async def schedule_grid(
+        db: AsyncSession,
+        teacher_ids: Sequence[int],
+        start: datetime,
+        end: datetime
+    ) -> ScheduleGridResponse:
+        """Сетка слотов нескольких преподавателей за период одним запросом.
+
+        LEFT JOIN оставляет в сетке преподавателей без слотов, а сортировка
+        по (teacher_id, start_time) совпадает с индексом, так что столбцы
+        собираются за один проход по строкам.
+        """
+        rows = await db.execute(
+            select(
+                User.id.label("teacher_id"), User.full_name,
+                Availability.id, Availability.start_time, Availability.end_time, Availability.is_booked
+            ).outerjoin(
+                Availability, and_(
+                    Availability.teacher_id == User.id,
+                    Availability.start_time >= as_naive_utc(start),
+                    Availability.start_time < as_naive_utc(end)
+                )
+            ).where(
+                User.id.in_(teacher_ids), User.role == UserRole.teacher
+            ).order_by(User.id, Availability.start_time, Availability.id)
+        )
+
+        columns: List[TeacherScheduleColumns] = []
+        for teacher_id, full_name, slot_id, start_time, end_time, is_booked in rows:
+            if not columns or columns[-1].teacher_id != teacher_id:
+                columns.append(TeacherScheduleColumns(
+                    teacher_id=teacher_id, teacher_name=full_name,
+                    slot_ids=[], starts=[], ends=[], booked=[]
+                ))
+            if slot_id is None:
+                continue
+            column = columns[-1]
+            column.slot_ids.append(slot_id)
+            column.starts.append(_unix_seconds(start_time))
+            column.ends.append(_unix_seconds(end_time))
+            column.booked.append(bool(is_booked))
+        return ScheduleGridResponse(start=start, end=end, teachers=columns)
+
+
+def _unix_seconds(value: datetime) -> int:
+    # В БД хранится naive UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def remove_overlapping_slots(connection) -> Tuple[int, int]:
+    """Удаляет пересекающиеся слоты, оставшиеся с тех пор, как БД их не запрещала.
+
+    Слоты, на которые есть бронирования, сохраняются всегда; из остальных
+    остается более ранний по id. Возвращает (удалено, неустранимых пересечений
+    между забронированными слотами).
+    """
+    rows = connection.execute(
+        select(
+            Availability.id, Availability.teacher_id, Availability.start_time, Availability.end_time,
+            exists().where(Booking.availability_id == Availability.id).label("has_bookings")
+        ).order_by(Availability.teacher_id)
+    ).all()
+    removed: List[int] = []
+    conflicts = 0
+    for _, slots in groupby(rows, key=lambda row: row.teacher_id):
+        kept = IntervalSet()
+        for slot in sorted(slots, key=lambda row: (not row.has_bookings, row.id)):
+            if kept.add(slot.start_time, slot.end_time):
+                continue
+            if slot.has_bookings:
+                conflicts += 1
+            else:
+                removed.append(slot.id)
+    for offset in range(0, len(removed), 500):
+        connection.execute(delete(Availability).where(Availability.id.in_(removed[offset:offset + 500])))
+    return len(removed), conflicts
@@ -1,128 +1,318 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from fastapi import HTTPException, status
+from app.models.archive import BookingArchive
 from app.models.booking import Booking, BookingStatus
 from app.models.availability import Availability
 from app.models.user import User
 from app.schemas.booking import BookingCreate, BookingWithDetails
+from app.services.change_tracker import TEACHER_AVAILABILITY, USER_BOOKINGS, ChangeTracker
+from app.services.notification_service import NotificationService
+from app.services.slot_events import SLOT_BOOKED, SLOT_RELEASED, slot_events
+from app.services.utilization_service import UtilizationService
+from app.utils.intervals import as_naive_utc
+from app.utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor
+from app.utils.serialization import ListSerializer
 from datetime import datetime
-from typing import List
+from itertools import groupby
+from typing import List, Optional
+
+booking_details_list = ListSerializer(BookingWithDetails)
 
 
 class BookingService:
     @staticmethod
-    def create_booking(db: Session, booking_data: BookingCreate, student_id: int) -> Booking:
-        availability = db.query(Availability).filter(
-            Availability.id == booking_data.availability_id
-        ).first()
-        
+    async def create_booking(db: AsyncSession, booking_data: BookingCreate, student_id: int) -> Booking:
+        now = datetime.utcnow()
+        # Условный UPDATE (compare-and-set по is_booked): из одновременных
+        # запросов на один слот строку изменит только один, остальные
+        # получат rowcount == 0 без блокировки несвязанных бронирований
+        claimed = await db.execute(
+            update(Availability).where(
+                Availability.id == booking_data.availability_id,
+                Availability.is_booked == False,
+                Availability.start_time >= now
+            ).values(is_booked=True).execution_options(synchronize_session=False)
+        )
+
+        if not claimed.rowcount:
+            await db.rollback()
+            await BookingService._raise_unavailable(db, booking_data.availability_id)
+
+        teacher = aliased(User)
+        student = aliased(User)
+        slot = (await db.execute(
+            select(
+                Availability.teacher_id, Availability.start_time, Availability.end_time, teacher.email, student.full_name
+            ).select_from(
+                Availability
+            ).join(
+                teacher, teacher.id == Availability.teacher_id
+            ).join(
+                student, student.id == student_id
+            ).where(Availability.id == booking_data.availability_id)
+        )).one()
+        booking = Booking(
+            availability_id=booking_data.availability_id,
+            student_id=student_id,
+            teacher_id=slot.teacher_id,
+            status=BookingStatus.pending,
+            created_at=now
+        )
+        db.add(booking)
+        NotificationService.notify_booking_created(db, slot.email, slot.full_name, slot.start_time.isoformat())
+        await UtilizationService.booking_changed(
+            db, slot.teacher_id, slot.start_time, slot.end_time, None, BookingStatus.pending
+        )
+        await ChangeTracker.bump(db, TEACHER_AVAILABILITY, slot.teacher_id)
+        await ChangeTracker.bump(db, USER_BOOKINGS, student_id, slot.teacher_id)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Уникальный индекс активных бронирований слота — последний рубеж
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Это место уже забронировано"
+            )
+        await db.refresh(booking)
+        await slot_events.publish(slot.teacher_id, SLOT_BOOKED, {
+            "id": booking.availability_id, "teacher_id": slot.teacher_id, "is_booked": True
+        })
+        return booking
+
+    @staticmethod
+    async def _raise_unavailable(db: AsyncSession, availability_id: int) -> None:
+        """Объясняет, почему слот не удалось занять."""
+        availability = await db.get(Availability, availability_id)
+
         if not availability:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Свободный слот не найден"
             )
-        
+
         if availability.is_booked:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Это место уже забронировано"
             )
-        
-        if availability.start_time < datetime.utcnow():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Не удается забронировать прошедший временной интервал"
-            )
-        
-        booking = Booking(
-            availability_id=booking_data.availability_id,
-            student_id=student_id,
-            teacher_id=availability.teacher_id,
-            status=BookingStatus.pending,
-            created_at=datetime.utcnow()
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Не удается забронировать прошедший временной интервал"
         )
-        
-        availability.is_booked = True
-        
-        db.add(booking)
-        db.commit()
-        db.refresh(booking)
-        return booking
 
     @staticmethod
-    def confirm_booking(db: Session, booking_id: int, teacher_id: int) -> Booking:
-        booking = db.query(Booking).filter(Booking.id == booking_id).first()
-        
+    async def confirm_booking(db: AsyncSession, booking_id: int, teacher_id: int) -> Booking:
+        booking = await db.get(Booking, booking_id)
+
         if not booking:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Бронирование не найдено"
             )
-        
+
         if booking.teacher_id != teacher_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Не авторизован для подтверждения этого бронирования"
             )
-        
-        booking.status = BookingStatus.confirmed
-        db.commit()
-        db.refresh(booking)
+
+        # Условный UPDATE: бронирование могли отменить (в том числе по
+        # истечении срока подтверждения) после чтения
+        confirmed = await db.execute(
+            update(Booking).where(
+                Booking.id == booking_id,
+                Booking.status != BookingStatus.cancelled
+            ).values(status=BookingStatus.confirmed).execution_options(synchronize_session=False)
+        )
+        if not confirmed.rowcount:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Бронирование отменено"
+            )
+        previous_status = booking.status
+        teacher = aliased(User)
+        student = aliased(User)
+        details = (await db.execute(
+            select(
+                student.email, teacher.full_name, Availability.start_time, Availability.end_time
+            ).select_from(Availability).join(
+                teacher, teacher.id == booking.teacher_id
+            ).join(
+                student, student.id == booking.student_id
+            ).where(Availability.id == booking.availability_id)
+        )).one()
+        NotificationService.notify_booking_confirmed(
+            db, details.email, details.full_name, details.start_time.isoformat()
+        )
+        await UtilizationService.booking_changed(
+            db, booking.teacher_id, details.start_time, details.end_time, previous_status, BookingStatus.confirmed
+        )
+        await ChangeTracker.bump(db, USER_BOOKINGS, booking.student_id, booking.teacher_id)
+        await db.commit()
+        await db.refresh(booking)
         return booking
 
     @staticmethod
-    def cancel_booking(db: Session, booking_id: int, user_id: int) -> Booking:
-        booking = db.query(Booking).filter(Booking.id == booking_id).first()
-        
+    async def cancel_booking(db: AsyncSession, booking_id: int, user_id: int) -> Booking:
+        booking = await db.get(Booking, booking_id)
+
         if not booking:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Бронирование не найдено"
             )
-        
+
         if booking.student_id != user_id and booking.teacher_id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Мы не уполномочены отменять это бронирование"
             )
-        
-        booking.status = BookingStatus.cancelled
-        availability = db.query(Availability).filter(
-            Availability.id == booking.availability_id
-        ).first()
-        
-        if availability:
-            availability.is_booked = False
-        
-        db.commit()
-        db.refresh(booking)
+
+        # Условный UPDATE по прочитанному статусу: из одновременных отмен (и
+        # отмены сборщиком просроченных) слот освободит и письмо отправит
+        # только одна. Если статус успели изменить, перечитываем его
+        previous_status = booking.status
+        released = False
+        while previous_status != BookingStatus.cancelled:
+            cancelled = await db.execute(
+                update(Booking).where(
+                    Booking.id == booking_id,
+                    Booking.status == previous_status
+                ).values(status=BookingStatus.cancelled).execution_options(synchronize_session=False)
+            )
+            if cancelled.rowcount == 1:
+                released = True
+                break
+            previous_status = await db.scalar(select(Booking.status).where(Booking.id == booking_id))
+            if previous_status is None:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Бронирование не найдено"
+                )
+
+        if released:
+            await db.execute(
+                update(Availability).where(
+                    Availability.id == booking.availability_id
+                ).values(is_booked=False).execution_options(synchronize_session=False)
+            )
+            # Уведомляем другую сторону бронирования
+            other_id = booking.teacher_id if user_id == booking.student_id else booking.student_id
+            details = (await db.execute(
+                select(User.email, Availability.start_time, Availability.end_time).select_from(Availability).join(
+                    User, User.id == other_id
+                ).where(Availability.id == booking.availability_id)
+            )).one()
+            NotificationService.notify_booking_cancelled(db, details.email, details.start_time.isoformat())
+            await UtilizationService.booking_changed(
+                db, booking.teacher_id, details.start_time, details.end_time, previous_status, BookingStatus.cancelled
+            )
+            await ChangeTracker.bump(db, TEACHER_AVAILABILITY, booking.teacher_id)
+            await ChangeTracker.bump(db, USER_BOOKINGS, booking.student_id, booking.teacher_id)
+
+        await db.commit()
+        await db.refresh(booking)
+        if released:
+            await slot_events.publish(booking.teacher_id, SLOT_RELEASED, {
+                "id": booking.availability_id, "teacher_id": booking.teacher_id, "is_booked": False
+            })
         return booking
 
     @staticmethod
-    def get_user_bookings(db: Session, user_id: int, role: str) -> List[BookingWithDetails]:
-        if role == "teacher":
-            bookings = db.query(Booking).filter(Booking.teacher_id == user_id).all()
-        else:
-            bookings = db.query(Booking).filter(Booking.student_id == user_id).all()
-        
-        result = []
-        for booking in bookings:
-            availability = db.query(Availability).filter(
-                Availability.id == booking.availability_id
-            ).first()
-            teacher = db.query(User).filter(User.id == booking.teacher_id).first()
-            student = db.query(User).filter(User.id == booking.student_id).first()
-            
-            result.append(BookingWithDetails(
-                id=booking.id,
-                availability_id=booking.availability_id,
-                student_id=booking.student_id,
-                teacher_id=booking.teacher_id,
-                status=booking.status,
-                created_at=booking.created_at,
-                start_time=availability.start_time,
-                end_time=availability.end_time,
-                teacher_name=teacher.full_name,
-                student_name=student.full_name
-            ))
-        
-        return result
+    async def get_user_bookings(
+        db: AsyncSession,
+        user_id: int,
+        role: str,
+        status_filter: Optional[BookingStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> List[BookingWithDetails]:
+        last_id = decode_cursor(cursor, int)[0] if cursor else None
+        # Время слотов хранится в naive UTC
+        date_from = as_naive_utc(date_from) if date_from else None
+        date_to = as_naive_utc(date_to) if date_to else None
+        # Рабочая таблица и архив фильтруются отдельно, каждая часть отдает не больше limit строк
+        parts = []
+        for source, start_time, end_time in (
+            (Booking, Availability.start_time, Availability.end_time),
+            (BookingArchive, BookingArchive.start_time, BookingArchive.end_time),
+        ):
+            query = select(
+                source.id,
+                source.availability_id,
+                source.student_id,
+                source.teacher_id,
+                source.status,
+                source.created_at,
+                start_time.label("start_time"),
+                end_time.label("end_time")
+            )
+            if source is Booking:
+                query = query.join(Availability, Availability.id == Booking.availability_id)
+
+            if role == "teacher":
+                query = query.where(source.teacher_id == user_id)
+            else:
+                query = query.where(source.student_id == user_id)
+
+            if status_filter:
+                query = query.where(source.status == status_filter)
+            if date_from:
+                query = query.where(start_time >= date_from)
+            if date_to:
+                query = query.where(start_time < date_to)
+            if last_id is not None:
+                query = query.where(source.id > last_id)
+            parts.append(select(query.order_by(source.id).limit(limit).subquery()))
+
+        # Имена одним JOIN только для строк итоговой страницы
+        history = union_all(*parts).subquery()
+        teacher = aliased(User)
+        student = aliased(User)
+        query = select(
+            history,
+            teacher.full_name.label("teacher_name"),
+            student.full_name.label("student_name")
+        ).join(
+            teacher, teacher.id == history.c.teacher_id
+        ).join(
+            student, student.id == history.c.student_id
+        )
+        rows = await db.execute(query.order_by(history.c.id).limit(limit))
+        return booking_details_list.from_rows(rows)
+
+
+def cancel_duplicate_bookings(connection) -> int:
+    """Отменяет лишние активные бронирования одного слота, оставшиеся с тех пор,
+    как БД их не запрещала, — иначе уникальный индекс не создать.
+
+    Остается подтвержденное, среди равных — более раннее по id. Возвращает
+    число отмененных бронирований.
+    """
+    duplicated = select(Booking.availability_id).where(
+        Booking.status != BookingStatus.cancelled
+    ).group_by(Booking.availability_id).having(func.count() > 1)
+    rows = connection.execute(
+        select(Booking.id, Booking.availability_id, Booking.status).where(
+            Booking.status != BookingStatus.cancelled,
+            Booking.availability_id.in_(duplicated)
+        ).order_by(Booking.availability_id)
+    ).all()
+    cancelled: List[int] = []
+    for _, bookings in groupby(rows, key=lambda row: row.availability_id):
+        ranked = sorted(bookings, key=lambda row: (row.status != BookingStatus.confirmed, row.id))
+        cancelled.extend(row.id for row in ranked[1:])
+    for offset in range(0, len(cancelled), 500):
+        connection.execute(
+            update(Booking).where(Booking.id.in_(cancelled[offset:offset + 500])).values(status=BookingStatus.cancelled)
+        )
+    return len(cancelled)
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from sqlalchemy import select, update
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.availability import Availability
+from app.models.booking import Booking, BookingStatus
+from app.models.user import User
+from app.services.change_tracker import TEACHER_AVAILABILITY, USER_BOOKINGS, ChangeTracker
+from app.services.notification_service import NotificationService
+from app.services.slot_events import SLOT_RELEASED, slot_events
+from app.services.utilization_service import UtilizationService
+from datetime import datetime, timedelta
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BookingSweeper:
+    """Фоновая отмена бронирований, которые преподаватель так и не подтвердил.
+
+    Каждая пачка — короткая транзакция: выборка по индексу (status,
+    created_at), условный UPDATE ... RETURNING только тех бронирований,
+    что все еще ожидают подтверждения, и освобождение их слотов. Поэтому
+    несколько воркеров и одновременное подтверждение не конфликтуют, а
+    блокировка записи не задерживает обычные бронирования надолго.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal,
+                 max_age_seconds: float = settings.PENDING_BOOKING_MAX_AGE_SECONDS,
+                 batch_size: int = settings.BOOKING_SWEEP_BATCH_SIZE,
+                 interval_seconds: float = settings.BOOKING_SWEEP_INTERVAL_SECONDS):
+        self.session_factory = session_factory
+        self.max_age = timedelta(seconds=max_age_seconds)
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep_batch(self) -> int:
+        """Отменяет одну пачку просроченных бронирований и возвращает их число."""
+        cutoff = datetime.utcnow() - self.max_age
+        async with self.session_factory() as db:
+            stale = select(Booking.id).where(
+                Booking.status == BookingStatus.pending,
+                Booking.created_at < cutoff
+            ).order_by(Booking.created_at, Booking.id).limit(self.batch_size)
+            expired_ids = (await db.scalars(
+                update(Booking).where(
+                    Booking.id.in_(stale.scalar_subquery()),
+                    Booking.status == BookingStatus.pending
+                ).values(status=BookingStatus.cancelled).returning(Booking.id).execution_options(
+                    synchronize_session=False
+                )
+            )).all()
+            if not expired_ids:
+                await db.commit()
+                return 0
+
+            expired = (await db.execute(
+                select(
+                    Booking.availability_id, Booking.teacher_id, Booking.student_id,
+                    Availability.start_time, Availability.end_time, User.email
+                ).join(
+                    Availability, Availability.id == Booking.availability_id
+                ).join(
+                    User, User.id == Booking.student_id
+                ).where(Booking.id.in_(expired_ids))
+            )).all()
+            await db.execute(
+                update(Availability).where(
+                    Availability.id.in_([row.availability_id for row in expired])
+                ).values(is_booked=False).execution_options(synchronize_session=False)
+            )
+            await NotificationService.notify_bookings_expired(
+                db, [(row.email, row.start_time.isoformat()) for row in expired]
+            )
+            await UtilizationService.bookings_changed(db, [
+                (row.teacher_id, row.start_time, row.end_time, BookingStatus.pending, BookingStatus.cancelled)
+                for row in expired
+            ])
+            teacher_ids = {row.teacher_id for row in expired}
+            await ChangeTracker.bump(db, TEACHER_AVAILABILITY, *teacher_ids)
+            await ChangeTracker.bump(db, USER_BOOKINGS, *teacher_ids, *(row.student_id for row in expired))
+            await db.commit()
+
+        for row in expired:
+            await slot_events.publish(row.teacher_id, SLOT_RELEASED, {
+                "id": row.availability_id, "teacher_id": row.teacher_id, "is_booked": False
+            })
+        logger.info("Отменено неподтвержденных бронирований: %s", len(expired))
+        return len(expired)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                expired = await self.sweep_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка очистки неподтвержденных бронирований")
+                expired = 0
+            # Полная пачка — следующую берем сразу, но отдаем цикл обычным запросам
+            await asyncio.sleep(0 if expired >= self.batch_size else self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+booking_sweeper = BookingSweeper()
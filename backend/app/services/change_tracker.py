@@ -0,0 +1,40 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.change_version import ChangeVersion
+
+TEACHER_AVAILABILITY = "teacher_availability"
+USER_BOOKINGS = "user_bookings"
+
+_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+class ChangeTracker:
+    """Счетчики изменений списков для условных GET.
+
+    Счетчик увеличивается в транзакции изменения, поэтому его значение
+    одинаково для всех воркеров, а проверка If-None-Match стоит одного
+    чтения по первичному ключу.
+    """
+
+    @staticmethod
+    async def bump(db: AsyncSession, scope: str, *keys: int) -> None:
+        keys = sorted(set(keys))
+        if not keys:
+            return
+        # Один upsert на все ключи; порядок ключей одинаков во всех транзакциях
+        statement = _INSERTS[db.bind.dialect.name](ChangeVersion).values(
+            [{"scope": scope, "key": key, "version": 1} for key in keys]
+        )
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[ChangeVersion.scope, ChangeVersion.key],
+            set_={"version": ChangeVersion.version + 1}
+        ))
+
+    @staticmethod
+    async def version(db: AsyncSession, scope: str, key: int) -> int:
+        version = await db.scalar(
+            select(ChangeVersion.version).where(ChangeVersion.scope == scope, ChangeVersion.key == key)
+        )
+        return version or 0
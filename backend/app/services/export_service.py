@@ -0,0 +1,140 @@
+import csv
+import enum
+import io
+import json
+from sqlalchemy import Select, select, union_all
+from sqlalchemy.orm import aliased
+from app.core.config import settings
+from app.core.database import ReplicaSessionLocal
+from app.models.archive import AvailabilityArchive, BookingArchive
+from app.models.availability import Availability
+from app.models.booking import Booking
+from app.models.user import User
+from app.utils.intervals import as_naive_utc
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+CSV = "csv"
+NDJSON = "ndjson"
+MEDIA_TYPES = {CSV: "text/csv; charset=utf-8", NDJSON: "application/x-ndjson"}
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _in_window(query: Select, start_time, date_from: Optional[datetime], date_to: Optional[datetime]) -> Select:
+    # Время слотов хранится в naive UTC
+    if date_from:
+        query = query.where(start_time >= as_naive_utc(date_from))
+    if date_to:
+        query = query.where(start_time < as_naive_utc(date_to))
+    return query
+
+
+class ExportService:
+    """Выгрузка истории бронирований и слотов потоком.
+
+    Строки читаются серверным курсором (asyncpg) или пачками yield_per
+    (aiosqlite) и сразу превращаются в CSV или NDJSON, поэтому память не
+    зависит от размера таблицы. Имена преподавателя и студента приходят в
+    том же запросе, архивные строки — вместе с рабочими.
+    """
+
+    @staticmethod
+    def bookings_query(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> Select:
+        """Бронирования из рабочей таблицы и из архива."""
+        parts = []
+        for source, start_time, end_time in (
+            (Booking, Availability.start_time, Availability.end_time),
+            (BookingArchive, BookingArchive.start_time, BookingArchive.end_time),
+        ):
+            query = select(
+                source.id,
+                source.availability_id,
+                source.status,
+                source.created_at,
+                start_time.label("start_time"),
+                end_time.label("end_time"),
+                source.teacher_id,
+                source.student_id
+            )
+            if source is Booking:
+                query = query.join(Availability, Availability.id == Booking.availability_id)
+            parts.append(_in_window(query, start_time, date_from, date_to))
+
+        history = union_all(*parts).subquery()
+        teacher = aliased(User)
+        student = aliased(User)
+        return select(
+            history.c.id,
+            history.c.availability_id,
+            history.c.status,
+            history.c.created_at,
+            history.c.start_time,
+            history.c.end_time,
+            history.c.teacher_id,
+            teacher.full_name.label("teacher_name"),
+            history.c.student_id,
+            student.full_name.label("student_name")
+        ).join(
+            teacher, teacher.id == history.c.teacher_id
+        ).join(
+            student, student.id == history.c.student_id
+        ).order_by(history.c.id)
+
+    @staticmethod
+    def availability_query(
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        teacher_id: Optional[int] = None
+    ) -> Select:
+        """Слоты из рабочей таблицы и из архива."""
+        parts = []
+        for source in (Availability, AvailabilityArchive):
+            query = select(source.id, source.teacher_id, source.start_time, source.end_time, source.is_booked)
+            if teacher_id:
+                query = query.where(source.teacher_id == teacher_id)
+            parts.append(_in_window(query, source.start_time, date_from, date_to))
+
+        slots = union_all(*parts).subquery()
+        return select(
+            slots.c.id,
+            slots.c.teacher_id,
+            User.full_name.label("teacher_name"),
+            slots.c.start_time,
+            slots.c.end_time,
+            slots.c.is_booked
+        ).join(User, User.id == slots.c.teacher_id).order_by(slots.c.id)
+
+    @staticmethod
+    async def stream(query: Select, fmt: str, batch_size: int = settings.EXPORT_BATCH_SIZE) -> AsyncIterator[str]:
+        # Своя сессия на реплике: генератор работает после выхода из обработчика запроса
+        async with ReplicaSessionLocal() as session:
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            columns = list(result.keys())
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if fmt == CSV:
+                writer.writerow(columns)
+
+            async for rows in result.partitions():
+                for row in rows:
+                    values = [_plain(value) for value in row]
+                    if fmt == CSV:
+                        writer.writerow(values)
+                    else:
+                        buffer.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+                        buffer.write("\n")
+                # Одна порция ответа на пачку строк
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+            # Заголовок CSV пустой выгрузки
+            if buffer.tell():
+                yield buffer.getvalue()
@@ -1,21 +1,71 @@
-from app.utils.email import send_email
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.notification import NotificationOutbox, OutboxStatus
+from datetime import datetime
+from typing import Iterable, Tuple
 
 
 class NotificationService:
+    """Записывает уведомления в outbox в транзакции вызывающего кода.
+
+    Письма отправляет OutboxDispatcher в фоне, поэтому запрос бронирования
+    не ждет почтовый сервер, а уведомление не теряется при откате.
+    """
+
+    @staticmethod
+    def enqueue(db: AsyncSession, kind: str, recipient: str, subject: str, body: str) -> NotificationOutbox:
+        now = datetime.utcnow()
+        notification = NotificationOutbox(
+            kind=kind,
+            recipient=recipient,
+            subject=subject,
+            body=body,
+            status=OutboxStatus.pending,
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now
+        )
+        db.add(notification)
+        return notification
+
     @staticmethod
-    async def notify_booking_created(teacher_email: str, student_name: str, start_time: str):
+    async def enqueue_many(db: AsyncSession, kind: str, messages: Iterable[Tuple[str, str, str]]) -> None:
+        """Пачка писем (получатель, тема, текст) одним INSERT без загрузки объектов в сессию."""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "kind": kind, "recipient": recipient, "subject": subject, "body": body,
+                "status": OutboxStatus.pending, "attempts": 0, "next_attempt_at": now, "created_at": now,
+            }
+            for recipient, subject, body in messages
+        ]
+        if rows:
+            await db.execute(insert(NotificationOutbox), rows)
+
+    @staticmethod
+    def notify_booking_created(db: AsyncSession, teacher_email: str, student_name: str, start_time: str):
         subject = "Новый запрос на бронирование"
         body = f"{student_name} запросил бронирование на  {start_time}. Пожалуйста, подтвердите или отмените заказ."
-        await send_email(teacher_email, subject, body)
+        return NotificationService.enqueue(db, "booking_created", teacher_email, subject, body)
 
     @staticmethod
-    async def notify_booking_confirmed(student_email: str, teacher_name: str, start_time: str):
+    def notify_booking_confirmed(db: AsyncSession, student_email: str, teacher_name: str, start_time: str):
         subject = "Бронирование подтверждено"
         body = f"Ваше бронирование с помощью {teacher_name} на {start_time} подтверждено."
-        await send_email(student_email, subject, body)
+        return NotificationService.enqueue(db, "booking_confirmed", student_email, subject, body)
 
     @staticmethod
-    async def notify_booking_cancelled(email: str, start_time: str):
+    def notify_booking_cancelled(db: AsyncSession, email: str, start_time: str):
         subject = "Бронирование отменено"
         body = f"Бронирование на {start_time} было отменено."
-        await send_email(email, subject, body)
+        return NotificationService.enqueue(db, "booking_cancelled", email, subject, body)
+
+    @staticmethod
+    async def notify_bookings_expired(db: AsyncSession, bookings: Iterable[Tuple[str, str]]) -> None:
+        """Письма студентам (email, начало слота) об отмене неподтвержденных бронирований."""
+        subject = "Бронирование не подтверждено"
+        await NotificationService.enqueue_many(db, "booking_expired", [
+            (student_email, subject,
+             f"Преподаватель не подтвердил бронирование на {start_time}, поэтому оно отменено, а место освобождено.")
+            for student_email, start_time in bookings
+        ])
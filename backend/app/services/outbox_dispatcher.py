@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import uuid
+from sqlalchemy import delete, select, update
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.notification import NotificationOutbox, OutboxStatus
+from app.utils.email import OutgoingEmail, get_mailer
+from datetime import datetime, timedelta
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """Фоновая отправка писем из notification_outbox пачками.
+
+    Пачка сначала захватывается одним условным UPDATE (claim_token и аренда
+    через next_attempt_at), поэтому несколько воркеров не отправят одно
+    письмо дважды, а письма упавшего воркера вернутся в очередь по истечении
+    аренды. Каждая пачка уходит через одно SMTP-соединение в пуле потоков,
+    неудачные письма повторяются с экспоненциальной задержкой. Раз в
+    OUTBOX_PRUNE_SECONDS отправленные и окончательно неотправленные письма
+    старше срока хранения удаляются.
+    """
+
+    PRUNE_BATCH_SIZE = 1000
+
+    def __init__(self, session_factory=AsyncSessionLocal, mailer=None,
+                 batch_size: int = settings.OUTBOX_BATCH_SIZE,
+                 poll_seconds: float = settings.OUTBOX_POLL_SECONDS,
+                 max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+                 prune_seconds: float = settings.OUTBOX_PRUNE_SECONDS):
+        self.session_factory = session_factory
+        self.mailer = mailer or get_mailer()
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.prune_seconds = prune_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+        return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+    async def dispatch_batch(self) -> int:
+        """Отправляет одну пачку и возвращает число обработанных писем."""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        async with self.session_factory() as db:
+            due = select(NotificationOutbox.id).where(
+                NotificationOutbox.status == OutboxStatus.pending,
+                NotificationOutbox.next_attempt_at <= now
+            ).order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id).limit(self.batch_size)
+            # Захваченные строки возвращаются тем же UPDATE, без повторной выборки
+            batch = sorted((await db.scalars(
+                update(NotificationOutbox).where(
+                    NotificationOutbox.id.in_(due.scalar_subquery()),
+                    NotificationOutbox.status == OutboxStatus.pending,
+                    NotificationOutbox.next_attempt_at <= now
+                ).values(
+                    claim_token=token,
+                    next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+                ).returning(NotificationOutbox).execution_options(synchronize_session=False)
+            )).all(), key=lambda item: item.id)
+            await db.commit()
+            if not batch:
+                return 0
+
+            # Сессия не держит соединение, пока идет отправка
+            await db.close()
+
+            errors = await asyncio.to_thread(self.mailer.send_batch, [
+                OutgoingEmail(item.recipient, item.subject, item.body) for item in batch
+            ])
+
+            finished_at = datetime.utcnow()
+            lost = 0
+            for item, error in zip(batch, errors):
+                attempts = item.attempts + 1
+                if error is None:
+                    values = dict(status=OutboxStatus.sent, sent_at=finished_at, last_error=None)
+                elif attempts >= self.max_attempts:
+                    values = dict(status=OutboxStatus.failed, attempts=attempts, last_error=error)
+                    logger.error("Письмо %s не отправлено после %s попыток: %s", item.id, attempts, error)
+                else:
+                    values = dict(
+                        attempts=attempts, last_error=error,
+                        next_attempt_at=finished_at + self.retry_delay(attempts)
+                    )
+                # Итог пишется, только пока аренда за нами: если она истекла
+                # и письмо захватил другой воркер, его claim_token уже другой
+                result = await db.execute(
+                    update(NotificationOutbox).where(
+                        NotificationOutbox.id == item.id,
+                        NotificationOutbox.claim_token == token
+                    ).values(claim_token=None, **values).execution_options(synchronize_session=False)
+                )
+                lost += not result.rowcount
+            await db.commit()
+            if lost:
+                logger.warning("Аренда %s писем истекла до окончания отправки", lost)
+            return len(batch)
+
+    async def prune(self) -> int:
+        """Удаляет старые отправленные и неотправленные письма пачками; возвращает их число."""
+        now = datetime.utcnow()
+        expired = (
+            (NotificationOutbox.status == OutboxStatus.sent)
+            & (NotificationOutbox.sent_at < now - timedelta(days=settings.OUTBOX_SENT_RETENTION_DAYS))
+        ) | (
+            (NotificationOutbox.status == OutboxStatus.failed)
+            & (NotificationOutbox.created_at < now - timedelta(days=settings.OUTBOX_FAILED_RETENTION_DAYS))
+        )
+        total = 0
+        while True:
+            async with self.session_factory() as db:
+                result = await db.execute(delete(NotificationOutbox).where(NotificationOutbox.id.in_(
+                    select(NotificationOutbox.id).where(expired).limit(self.PRUNE_BATCH_SIZE).scalar_subquery()
+                )).execution_options(synchronize_session=False))
+                await db.commit()
+            total += result.rowcount
+            if result.rowcount < self.PRUNE_BATCH_SIZE:
+                return total
+
+    async def run(self) -> None:
+        pruned_at = None
+        while True:
+            try:
+                loop_time = asyncio.get_running_loop().time()
+                if pruned_at is None or loop_time - pruned_at >= self.prune_seconds:
+                    pruned_at = loop_time
+                    await self.prune()
+                processed = await self.dispatch_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка диспетчера outbox")
+                processed = 0
+            # Полная пачка — в очереди, вероятно, есть еще письма
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,64 @@
+"""Локальный pub/sub-хаб для рассылки событий слотов между воркерами.
+
+Каждый воркер держит одно TCP-соединение с хабом и отправляет события
+строками JSON; хаб пересылает каждую строку всем подключенным воркерам,
+включая отправителя. Это замена внешнего брокера для разработки и
+нагрузочных тестов:
+
+    python -m app.services.pubsub_hub --port 8765
+    PUBSUB_HUB_URL=tcp://127.0.0.1:8765 uvicorn app.main:app --workers 4
+"""
+import argparse
+import asyncio
+import logging
+from typing import Set
+
+logger = logging.getLogger(__name__)
+
+MAX_LINE_BYTES = 1 << 20
+
+
+class PubSubHub:
+    def __init__(self):
+        self.clients: Set[asyncio.StreamWriter] = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for client in list(self.clients):
+                    client.write(line)
+                await asyncio.gather(*(self._drain(client) for client in list(self.clients)))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def _drain(self, client: asyncio.StreamWriter) -> None:
+        try:
+            await client.drain()
+        except ConnectionError:
+            self.clients.discard(client)
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_BYTES)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = await PubSubHub().serve(args.host, args.port)
+    print(f"pub/sub hub listening on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+from app.core.config import settings
+from app.models.availability import Availability
+from typing import AsyncIterator, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SLOT_CREATED = "slot_created"
+SLOT_UPDATED = "slot_updated"
+SLOT_DELETED = "slot_deleted"
+SLOT_BOOKED = "slot_booked"
+SLOT_RELEASED = "slot_released"
+
+# Событие, после которого подписчик должен перечитать список слотов
+RESYNC = "resync"
+
+
+def slot_payload(availability: Availability) -> dict:
+    return {
+        "id": availability.id,
+        "teacher_id": availability.teacher_id,
+        "start_time": availability.start_time.isoformat(),
+        "end_time": availability.end_time.isoformat(),
+        "is_booked": availability.is_booked,
+    }
+
+
+class SlotEventBus:
+    """Рассылка событий слотов подписчикам по преподавателям.
+
+    Подписчики одного процесса получают события из своих очередей. Если
+    задан PUBSUB_HUB_URL, публикация идет через хаб, который возвращает
+    событие всем воркерам, и каждый воркер раздает его своим подписчикам.
+    Публикация не ждет подписчиков: переполненная очередь медленного
+    клиента заменяется событием resync.
+    """
+
+    def __init__(self, hub_url: Optional[str] = None, queue_size: int = 100):
+        self.hub_url = hub_url
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscriber_count(self, teacher_id: Optional[int] = None) -> int:
+        if teacher_id is not None:
+            return len(self._subscribers.get(teacher_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, teacher_id: int) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(teacher_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(teacher_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[teacher_id]
+
+    async def publish(self, teacher_id: int, event: str, data: dict) -> None:
+        message = {"teacher_id": teacher_id, "event": event, "data": data}
+        if self._writer is not None and not self._writer.is_closing():
+            try:
+                self._writer.write(json.dumps(message, default=str).encode("utf-8") + b"\n")
+                return
+            except (ConnectionError, RuntimeError):
+                logger.warning("Хаб событий недоступен, рассылка только внутри процесса")
+        self._deliver(message)
+
+    def _deliver(self, message: dict) -> None:
+        for queue in list(self._subscribers.get(message["teacher_id"], ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Клиент не успевает: сбрасываем очередь и просим перечитать список
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"teacher_id": message["teacher_id"], "event": RESYNC, "data": {}})
+
+    async def _listen_hub(self) -> None:
+        address = urlparse(self.hub_url)
+        delay = 0.5
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(address.hostname, address.port, limit=1 << 20)
+                self._writer = writer
+                delay = 0.5
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self._deliver(json.loads(line))
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ValueError) as exc:
+                logger.warning("Соединение с хабом событий потеряно: %s", exc)
+            finally:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def start(self) -> None:
+        if self.hub_url and self._task is None:
+            self._task = asyncio.create_task(self._listen_hub())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+slot_events = SlotEventBus(settings.PUBSUB_HUB_URL, settings.SLOT_EVENTS_QUEUE_SIZE)
@@ -0,0 +1,114 @@
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from pydantic import TypeAdapter
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from app.core.config import settings
+from app.models.user import User, UserRole
+from app.schemas.user import UserResponse
+from app.utils.cache import TTLCache
+from app.utils.pagination import decode_cursor, next_cursor
+from typing import List, Optional
+
+_teacher_list = TypeAdapter(List[UserResponse])
+
+
+@dataclass
+class DirectoryPage:
+    body: bytes
+    etag: str
+    next_cursor: Optional[str]
+
+
+class TeacherDirectory:
+    """Версионированный кэш сериализованных страниц каталога преподавателей.
+
+    Версия увеличивается при регистрации, изменении или удалении
+    преподавателя, и страницы прошлой версии больше не читаются. ETag
+    вычисляется по содержимому, поэтому он совпадает у всех воркеров;
+    TTL ограничивает устаревание кэша в соседних процессах.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._pages = TTLCache(max_size, ttl)
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+        self._pages.clear()
+
+    def stats(self) -> dict:
+        return {"version": self.version, **self._pages.stats()}
+
+    async def get_page(self, db: AsyncSession, search: Optional[str], cursor: Optional[str], limit: int) -> DirectoryPage:
+        search = " ".join(search.split()).lower() if search else None
+        key = (self.version, search, cursor, limit)
+        page = self._pages.get(key)
+        if page is None:
+            teachers = await self._load(db, search, cursor, limit)
+            body = _teacher_list.dump_json(teachers)
+            page = DirectoryPage(
+                body=body,
+                etag=f'"{hashlib.sha1(body).hexdigest()}"',
+                next_cursor=next_cursor(teachers, limit, "id")
+            )
+            self._pages.set(key, page)
+        return page
+
+    async def _load(self, db: AsyncSession, search: Optional[str], cursor: Optional[str], limit: int) -> List[UserResponse]:
+        query = select(User.id, User.email, User.full_name, User.role).where(User.role == UserRole.teacher)
+        if search:
+            query = query.where(name_search_clause(db.bind.dialect.name, search))
+        if cursor:
+            (last_id,) = decode_cursor(cursor, int)
+            query = query.where(User.id > last_id)
+        rows = await db.execute(query.order_by(User.id).limit(limit))
+        return [UserResponse(**row._mapping) for row in rows]
+
+
+def name_search_clause(dialect: str, search: str):
+    """Условие поиска по имени, использующее FTS5 на SQLite и pg_trgm на PostgreSQL."""
+    if dialect == "sqlite":
+        tokens = re.findall(r"\w+", search)
+        match = " ".join(f'"{token}"*' for token in tokens) or '""'
+        return User.id.in_(
+            select(text("rowid")).select_from(text("users_fts")).where(
+                text("users_fts MATCH :match").bindparams(match=match)
+            )
+        )
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return User.full_name.ilike(f"%{escaped}%", escape="\\")
+
+
+teacher_directory = TeacherDirectory(settings.TEACHER_DIRECTORY_CACHE_MAX_SIZE, settings.TEACHER_DIRECTORY_CACHE_TTL_SECONDS)
+
+
+_DIRECTORY_CHANGED = "teacher_directory_changed"
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_directory_changed(mapper, connection, target: User) -> None:
+    # Flush еще не commit: сбрасываем кэш после фиксации, иначе соседний
+    # запрос успеет закэшировать старую страницу под новой версией
+    if target.role == UserRole.teacher or inspect(target).attrs.role.history.has_changes():
+        session = object_session(target)
+        if session is not None:
+            session.info[_DIRECTORY_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_directory(session: Session) -> None:
+    if session.info.pop(_DIRECTORY_CHANGED, False):
+        teacher_directory.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_directory_changes(session: Session) -> None:
+    session.info.pop(_DIRECTORY_CHANGED, None)
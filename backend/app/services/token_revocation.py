@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.instrumentation import registry
+from app.models.token_revocation import TokenRevocation
+from app.schemas.user import TokenPayload
+from app.utils.bloom import BloomFilter
+from app.utils.metrics import Observed
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _epoch(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class TokenRevocationList:
+    """Проверка отзыва токенов без обращения к БД на каждый запрос.
+
+    Отозванные jti лежат в таблице token_revocations, а в памяти процесса —
+    фильтр Блума по ним и время отзыва всех токенов пользователя. Фильтр
+    отвечает «точно не отозван» для почти всех токенов; только при
+    срабатывании фильтра jti проверяется в таблице по уникальному индексу.
+    Фоновая задача раз в TOKEN_REVOCATION_SYNC_SECONDS подтягивает отзывы
+    других воркеров, а раз в TOKEN_REVOCATION_PRUNE_SECONDS удаляет
+    истекшие строки и пересобирает фильтр.
+    """
+
+    # Запас на транзакции, зафиксированные позже соседних
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, session_factory=AsyncSessionLocal,
+                 capacity: int = settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+                 error_rate: float = settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+                 sync_seconds: float = settings.TOKEN_REVOCATION_SYNC_SECONDS,
+                 prune_seconds: float = settings.TOKEN_REVOCATION_PRUNE_SECONDS):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self.prune_seconds = prune_seconds
+        self.bloom_hits = 0
+        self.lookups = 0
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._user_cutoffs: Dict[int, float] = {}
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._synced_at is not None
+
+    def revoke(self, db: AsyncSession, token: TokenPayload) -> TokenRevocation:
+        """Добавляет отзыв токена в транзакцию вызывающего кода; после commit передайте его в remember()."""
+        revocation = TokenRevocation(
+            jti=token.jti,
+            user_id=token.sub,
+            revoked_at=datetime.utcnow(),
+            expires_at=datetime.utcfromtimestamp(token.exp)
+        )
+        db.add(revocation)
+        return revocation
+
+    def revoke_user(self, db: AsyncSession, user_id: int) -> TokenRevocation:
+        """Отзыв всех токенов пользователя, выпущенных до этого момента."""
+        now = datetime.utcnow()
+        lifetime = max(timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+                       timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+        revocation = TokenRevocation(jti=None, user_id=user_id, revoked_at=now, expires_at=now + lifetime)
+        db.add(revocation)
+        return revocation
+
+    def remember(self, *revocations: TokenRevocation) -> None:
+        """Сразу учитывает зафиксированные отзывы в этом процессе, не дожидаясь синхронизации."""
+        for revocation in revocations:
+            if revocation.jti:
+                self._bloom.add(revocation.jti)
+            else:
+                cutoff = _epoch(revocation.revoked_at)
+                self._user_cutoffs[revocation.user_id] = max(cutoff, self._user_cutoffs.get(revocation.user_id, 0.0))
+
+    def user_revoked(self, token: TokenPayload) -> bool:
+        """Токен выпущен до отзыва всех токенов пользователя; токены без iat считаются старыми."""
+        cutoff = self._user_cutoffs.get(token.sub)
+        return cutoff is not None and (token.iat or 0.0) <= cutoff
+
+    async def token_revoked(self, db: AsyncSession, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        if self.loaded:
+            if jti not in self._bloom:
+                return False
+            self.bloom_hits += 1
+        self.lookups += 1
+        return await db.scalar(select(TokenRevocation.id).where(TokenRevocation.jti == jti)) is not None
+
+    async def is_revoked(self, db: AsyncSession, token: TokenPayload) -> bool:
+        if not self.loaded:
+            # До первой загрузки проверяем по таблице
+            self.lookups += 1
+            issued_at = datetime.utcfromtimestamp(token.iat or 0.0)
+            conditions = [TokenRevocation.jti.is_(None) & (TokenRevocation.revoked_at >= issued_at)]
+            if token.jti:
+                conditions.append(TokenRevocation.jti == token.jti)
+            return await db.scalar(select(TokenRevocation.id).where(
+                TokenRevocation.user_id == token.sub, or_(*conditions)
+            ).limit(1)) is not None
+        return self.user_revoked(token) or await self.token_revoked(db, token.jti)
+
+    async def reload(self) -> None:
+        """Удаляет истекшие отзывы и пересобирает фильтр по оставшимся."""
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            await db.execute(delete(TokenRevocation).where(TokenRevocation.expires_at < now))
+            await db.commit()
+            revocations = (await db.scalars(select(TokenRevocation))).all()
+
+        token_count = sum(1 for revocation in revocations if revocation.jti)
+        bloom = BloomFilter(max(self.capacity, 2 * token_count), self.error_rate)
+        user_cutoffs: Dict[int, float] = {}
+        for revocation in revocations:
+            if revocation.jti:
+                bloom.add(revocation.jti)
+            else:
+                cutoff = _epoch(revocation.revoked_at)
+                user_cutoffs[revocation.user_id] = max(cutoff, user_cutoffs.get(revocation.user_id, 0.0))
+        self._bloom, self._user_cutoffs, self._synced_at = bloom, user_cutoffs, now
+
+    async def sync(self) -> None:
+        """Подтягивает отзывы, сделанные другими воркерами после прошлой синхронизации."""
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            revocations = (await db.scalars(select(TokenRevocation).where(
+                TokenRevocation.revoked_at >= self._synced_at - self.SYNC_OVERLAP
+            ))).all()
+        self.remember(*revocations)
+        self._synced_at = now
+
+    async def run(self) -> None:
+        reloaded_at = None
+        while True:
+            try:
+                loop_time = asyncio.get_running_loop().time()
+                if reloaded_at is None or loop_time - reloaded_at >= self.prune_seconds:
+                    await self.reload()
+                    reloaded_at = loop_time
+                else:
+                    await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка синхронизации отозванных токенов")
+            await asyncio.sleep(self.sync_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "tokens": self._bloom.count,
+            "users": len(self._user_cutoffs),
+            "bloom_bits": self._bloom.size,
+            "bloom_hits": self.bloom_hits,
+            "lookups": self.lookups,
+        }
+
+
+token_revocations = TokenRevocationList()
+
+registry.register(Observed(
+    "token_revocation_bloom_hits_total", "Revocation Bloom filter matches checked in the database", "counter",
+    lambda: token_revocations.bloom_hits
+))
+registry.register(Observed(
+    "token_revocation_lookups_total", "Revocation checks that queried the database", "counter",
+    lambda: token_revocations.lookups
+))
+registry.register(Observed(
+    "token_revocation_tokens", "Revoked token ids in the Bloom filter", "gauge",
+    lambda: token_revocations.stats()["tokens"]
+))
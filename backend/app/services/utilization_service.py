@@ -0,0 +1,223 @@
+"""Загрузка преподавателей: суточные итоги и недельный отчет.
+
+Итоги в teacher_daily_stats изменяются на дельту в той же транзакции, что
+и слот или бронирование; архивация их не меняет. Полный пересчет из
+рабочих и архивных таблиц (для заполнения истории или после ручных правок
+в БД; история, удаленная политикой delete, в него не попадет):
+
+    python -m app.services.utilization_service rebuild
+"""
+import argparse
+from collections import defaultdict
+from sqlalchemy import Integer, case, cast, delete, extract, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.archive import AvailabilityArchive, BookingArchive
+from app.models.availability import Availability
+from app.models.booking import Booking, BookingStatus
+from app.models.teacher_stats import TeacherDailyStats
+from app.models.user import User
+from app.schemas.analytics import TeacherWeekUtilization
+from app.utils.intervals import as_naive_utc
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+COUNTERS = (
+    "slots_offered", "offered_seconds", "booked_seconds",
+    "bookings_created", "bookings_confirmed", "bookings_cancelled",
+)
+
+
+def _slot_day_and_seconds(start_time: datetime, end_time: datetime) -> Tuple[date, int]:
+    start_time, end_time = as_naive_utc(start_time), as_naive_utc(end_time)
+    return start_time.date(), round((end_time - start_time).total_seconds())
+
+
+def _booking_counters(booking_status: Optional[BookingStatus], seconds: int) -> Dict[str, int]:
+    """Вклад бронирования в итоги; None — бронирования нет."""
+    if booking_status is None:
+        return {}
+    return {
+        "bookings_created": 1,
+        "bookings_confirmed": int(booking_status == BookingStatus.confirmed),
+        "bookings_cancelled": int(booking_status == BookingStatus.cancelled),
+        "booked_seconds": seconds if booking_status != BookingStatus.cancelled else 0,
+    }
+
+
+class UtilizationService:
+    @staticmethod
+    async def add(db: AsyncSession, deltas: Dict[Tuple[int, date], Dict[str, int]]) -> None:
+        """Прибавляет дельты к итогам (преподаватель, день) одним upsert на все строки."""
+        rows = [
+            {"teacher_id": teacher_id, "day": day, **{name: values.get(name, 0) for name in COUNTERS}}
+            for (teacher_id, day), values in sorted(deltas.items())
+            if any(values.values())
+        ]
+        if not rows:
+            return
+        insert_statement = _INSERTS[db.bind.dialect.name](TeacherDailyStats).values(rows)
+        await db.execute(insert_statement.on_conflict_do_update(
+            index_elements=[TeacherDailyStats.teacher_id, TeacherDailyStats.day],
+            set_={name: getattr(TeacherDailyStats, name) + insert_statement.excluded[name] for name in COUNTERS}
+        ))
+
+    @staticmethod
+    async def slots_changed(db: AsyncSession, teacher_id: int, slots: Iterable[Tuple[datetime, datetime]], sign: int = 1) -> None:
+        """Слоты добавлены (sign=1) или убраны (sign=-1) из предложения преподавателя."""
+        per_day: Dict[Tuple[int, date], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for start_time, end_time in slots:
+            day, seconds = _slot_day_and_seconds(start_time, end_time)
+            totals = per_day[(teacher_id, day)]
+            totals["slots_offered"] += sign
+            totals["offered_seconds"] += sign * seconds
+        await UtilizationService.add(db, per_day)
+
+    @staticmethod
+    async def booking_changed(
+        db: AsyncSession,
+        teacher_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        old_status: Optional[BookingStatus],
+        new_status: BookingStatus
+    ) -> None:
+        """Бронирование создано (old_status=None) или сменило статус."""
+        await UtilizationService.bookings_changed(db, [(teacher_id, start_time, end_time, old_status, new_status)])
+
+    @staticmethod
+    async def bookings_changed(
+        db: AsyncSession,
+        changes: Iterable[Tuple[int, datetime, datetime, Optional[BookingStatus], BookingStatus]]
+    ) -> None:
+        """Пачка изменений: одна запись итогов на преподавателя и день."""
+        per_day: Dict[Tuple[int, date], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for teacher_id, start_time, end_time, old_status, new_status in changes:
+            day, seconds = _slot_day_and_seconds(start_time, end_time)
+            totals = per_day[(teacher_id, day)]
+            for name, value in _booking_counters(new_status, seconds).items():
+                totals[name] += value
+            for name, value in _booking_counters(old_status, seconds).items():
+                totals[name] -= value
+        await UtilizationService.add(db, per_day)
+
+    @staticmethod
+    async def weekly(
+        db: AsyncSession,
+        date_from: date,
+        date_to: date,
+        teacher_ids: Optional[Sequence[int]] = None
+    ) -> List[TeacherWeekUtilization]:
+        """Недельный отчет по неделям с понедельника; читает только суточные итоги периода."""
+        query = select(TeacherDailyStats, User.full_name).join(
+            User, User.id == TeacherDailyStats.teacher_id
+        ).where(
+            TeacherDailyStats.day >= date_from,
+            TeacherDailyStats.day < date_to
+        )
+        if teacher_ids:
+            query = query.where(TeacherDailyStats.teacher_id.in_(teacher_ids))
+
+        weeks: Dict[Tuple[int, date], Dict[str, int]] = {}
+        names: Dict[int, str] = {}
+        for stats, full_name in await db.execute(query):
+            names[stats.teacher_id] = full_name
+            week_start = stats.day - timedelta(days=stats.day.weekday())
+            totals = weeks.setdefault((stats.teacher_id, week_start), dict.fromkeys(COUNTERS, 0))
+            for name in COUNTERS:
+                totals[name] += getattr(stats, name)
+
+        report = []
+        for (teacher_id, week_start), totals in sorted(weeks.items()):
+            if not any(totals.values()):
+                # Строки, обнуленные удалением слотов
+                continue
+            bookings = totals["bookings_created"]
+            report.append(TeacherWeekUtilization(
+                teacher_id=teacher_id,
+                teacher_name=names[teacher_id],
+                week_start=week_start,
+                offered_hours=totals["offered_seconds"] / 3600,
+                booked_hours=totals["booked_seconds"] / 3600,
+                utilization=totals["booked_seconds"] / totals["offered_seconds"] if totals["offered_seconds"] else 0.0,
+                slots_offered=totals["slots_offered"],
+                bookings=bookings,
+                confirmed=totals["bookings_confirmed"],
+                cancelled=totals["bookings_cancelled"],
+                confirmation_rate=totals["bookings_confirmed"] / bookings if bookings else 0.0,
+                cancellation_rate=totals["bookings_cancelled"] / bookings if bookings else 0.0,
+            ))
+        return report
+
+    @staticmethod
+    def rebuild(connection: Connection) -> int:
+        """Пересчитывает итоги из рабочих и архивных таблиц; возвращает число строк."""
+
+        def seconds(start_time, end_time):
+            if connection.dialect.name == "sqlite":
+                return cast(func.round((func.julianday(end_time) - func.julianday(start_time)) * 86400), Integer)
+            return cast(extract("epoch", end_time - start_time), Integer)
+
+        totals: Dict[Tuple[int, date], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for slot in (Availability, AvailabilityArchive):
+            day = func.date(slot.start_time)
+            slots = select(
+                slot.teacher_id, day, func.count(), func.sum(seconds(slot.start_time, slot.end_time))
+            ).group_by(slot.teacher_id, day)
+            for teacher_id, slot_day, count, offered in connection.execute(slots):
+                row = totals[(teacher_id, slot_day)]
+                row["slots_offered"] += count
+                row["offered_seconds"] += offered or 0
+
+        for booking, start_time, end_time in (
+            (Booking, Availability.start_time, Availability.end_time),
+            (BookingArchive, BookingArchive.start_time, BookingArchive.end_time),
+        ):
+            day = func.date(start_time)
+            bookings = select(
+                booking.teacher_id, day, func.count(),
+                func.sum(case((booking.status == BookingStatus.confirmed, 1), else_=0)),
+                func.sum(case((booking.status == BookingStatus.cancelled, 1), else_=0)),
+                func.sum(case((booking.status != BookingStatus.cancelled, seconds(start_time, end_time)), else_=0))
+            ).group_by(booking.teacher_id, day)
+            if booking is Booking:
+                bookings = bookings.join(Availability, Availability.id == Booking.availability_id)
+            for teacher_id, slot_day, created, confirmed, cancelled, booked in connection.execute(bookings):
+                row = totals[(teacher_id, slot_day)]
+                row["bookings_created"] += created
+                row["bookings_confirmed"] += confirmed or 0
+                row["bookings_cancelled"] += cancelled or 0
+                row["booked_seconds"] += booked or 0
+
+        connection.execute(delete(TeacherDailyStats))
+        rows = [
+            # На SQLite date() возвращает строку
+            {"teacher_id": teacher_id, "day": date.fromisoformat(slot_day) if isinstance(slot_day, str) else slot_day, **row}
+            for (teacher_id, slot_day), row in totals.items()
+        ]
+        for start in range(0, len(rows), 10000):
+            connection.execute(insert(TeacherDailyStats), rows[start:start + 10000])
+        return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    from app.core.database import Base, engine
+
+    Base.metadata.create_all(bind=engine, tables=[
+        TeacherDailyStats.__table__, AvailabilityArchive.__table__, BookingArchive.__table__
+    ])
+    with engine.begin() as connection:
+        count = UtilizationService.rebuild(connection)
+    print(f"teacher_daily_stats: {count} rows rebuilt")
+
+
+if __name__ == "__main__":
+    main()
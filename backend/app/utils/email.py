@@ -1,5 +1,92 @@
-async def send_email(to_email: str, subject: str, body: str) -> bool:
-    print(f"Отправка электронного письма по адресу {to_email}")
-    print(f"Предмет: {subject}")
-    print(f"Контент: {body}")
-    return True
+import smtplib
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import List, Optional
+from app.core.config import settings
+
+
+@dataclass
+class OutgoingEmail:
+    to_email: str
+    subject: str
+    body: str
+
+
+class ConsoleMailer:
+    """Выводит письма в консоль, если SMTP не настроен."""
+
+    def send_batch(self, messages: List[OutgoingEmail]) -> List[Optional[str]]:
+        for message in messages:
+            print(f"Отправка электронного письма по адресу {message.to_email}")
+            print(f"Предмет: {message.subject}")
+            print(f"Контент: {message.body}")
+        return [None] * len(messages)
+
+
+class SMTPMailer:
+    """Отправляет пачку писем через одно SMTP-соединение.
+
+    Блокирующий, вызывается из пула потоков. Возвращает для каждого письма
+    None при успехе или текст ошибки.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = False, timeout: float = 10.0, sender: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.sender = sender or settings.MAIL_FROM
+
+    def send_batch(self, messages: List[OutgoingEmail]) -> List[Optional[str]]:
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except (OSError, smtplib.SMTPException) as exc:
+            return [f"connect: {exc}"] * len(messages)
+
+        errors: List[Optional[str]] = []
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            for message in messages:
+                try:
+                    smtp.send_message(self._build(message))
+                    errors.append(None)
+                except smtplib.SMTPServerDisconnected as exc:
+                    errors.extend([f"disconnected: {exc}"] * (len(messages) - len(errors)))
+                    break
+                except (OSError, smtplib.SMTPException) as exc:
+                    errors.append(str(exc))
+        except (OSError, smtplib.SMTPException) as exc:
+            errors.extend([str(exc)] * (len(messages) - len(errors)))
+        finally:
+            try:
+                smtp.quit()
+            except (OSError, smtplib.SMTPException):
+                smtp.close()
+        return errors
+
+    def _build(self, message: OutgoingEmail) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = message.to_email
+        email["Subject"] = message.subject
+        email.set_content(message.body)
+        return email
+
+
+def get_mailer():
+    if not settings.SMTP_HOST:
+        return ConsoleMailer()
+    return SMTPMailer(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        username=settings.SMTP_USERNAME,
+        password=settings.SMTP_PASSWORD,
+        use_tls=settings.SMTP_USE_TLS,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,48 @@
+import bisect
+from datetime import datetime, timezone
+from typing import Iterable, List, Tuple
+
+
+def as_naive_utc(value: datetime) -> datetime:
+    """Приводит время к naive UTC, в котором слоты хранятся в БД."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class IntervalSet:
+    """Отсортированный набор непересекающихся полуинтервалов [start, end).
+
+    Раз интервалы не пересекаются, их концы упорядочены так же, как начала,
+    поэтому пересечение с новым интервалом может быть только у ближайшего
+    интервала, начинающегося до его конца, — это один bisect, O(log n).
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()):
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        for start, end in sorted((as_naive_utc(start), as_naive_utc(end)) for start, end in intervals):
+            # Пересекающиеся входные интервалы (старые данные) сливаются в один
+            if self._ends and start < self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], end)
+                continue
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        start, end = as_naive_utc(start), as_naive_utc(end)
+        index = bisect.bisect_left(self._starts, end) - 1
+        return index >= 0 and self._ends[index] > start
+
+    def add(self, start: datetime, end: datetime) -> bool:
+        """Добавляет интервал, если он ни с чем не пересекается."""
+        if self.overlaps(start, end):
+            return False
+        start, end = as_naive_utc(start), as_naive_utc(end)
+        index = bisect.bisect_left(self._starts, start)
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        return True
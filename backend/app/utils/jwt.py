@@ -1,15 +1,46 @@
+import hashlib
+import time
 from typing import Optional
+from app.core.config import settings
+from app.core.instrumentation import registry
 from app.core.security import decode_token
 from app.schemas.user import TokenPayload
+from app.utils.cache import TTLCache
+from app.utils.metrics import Observed
 
+# Проверенные токены по SHA-256 от токена; запись живет до exp токена
+token_cache = TTLCache(settings.TOKEN_CACHE_MAX_SIZE, ttl=0)
+
+registry.register(Observed("token_cache_hits_total", "Verified JWT cache hits", "counter", lambda: token_cache.hits))
+registry.register(Observed("token_cache_misses_total", "Verified JWT cache misses", "counter", lambda: token_cache.misses))
+registry.register(Observed("token_cache_size", "Verified JWT cache entries", "gauge", lambda: token_cache.stats()["size"]))
+
+
+def _verified_payload(token: str) -> Optional[tuple]:
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached
 
-def verify_token(token: str, token_type: str = "access") -> Optional[TokenPayload]:
     payload = decode_token(token)
     if not payload:
+        # Невалидные токены не кэшируем, чтобы мусорные запросы не вытесняли рабочие записи
+        return None
+
+    entry = (payload.get("type"), TokenPayload(**payload))
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        token_cache.set(key, entry, ttl=ttl)
+    return entry
+
+
+def verify_token(token: str, token_type: str = "access") -> Optional[TokenPayload]:
+    entry = _verified_payload(token)
+    if not entry:
         return None
     
-    if payload.get("type") != token_type:
+    payload_type, token_data = entry
+    if payload_type != token_type:
         return None
     
-    token_data = TokenPayload(**payload)
     return token_data
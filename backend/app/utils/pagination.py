@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+from fastapi import HTTPException, status
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _parse_cursor_value(value: Any, kind: type) -> Any:
+    if kind is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if kind is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if kind is str and isinstance(value, str):
+        return value
+    raise ValueError(value)
+
+
+def decode_cursor(cursor: str, *kinds: type) -> List[Any]:
+    """Значения курсора, приведенные к типам kinds (int, str или datetime); иначе 400."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(kinds):
+            raise ValueError(values)
+        return [_parse_cursor_value(value, kind) for value, kind in zip(values, kinds)]
+    except (ValueError, UnicodeError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Недопустимый курсор"
+        )
+
+
+def next_cursor(items: list, limit: int, *fields: str) -> Optional[str]:
+    """Курсор следующей страницы или None, если страница последняя."""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(*(getattr(last, field) for field in fields))
@@ -0,0 +1,29 @@
+from typing import Any, Generic, Iterable, List, Mapping, Optional, Type, TypeVar
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+Schema = TypeVar("Schema", bound=BaseModel)
+
+
+class ListSerializer(Generic[Schema]):
+    """Быстрая сериализация списков для маршрутов, которые выбирают ее явно.
+
+    TypeAdapter собирается один раз, JSON пишет pydantic-core. Маршрут
+    возвращает готовый Response, поэтому FastAPI не проверяет список повторно
+    по response_model — он остается только для документации.
+    """
+
+    def __init__(self, schema: Type[Schema]):
+        self.schema = schema
+        self._adapter = TypeAdapter(List[schema])
+
+    def from_rows(self, rows: Iterable[Any]) -> List[Schema]:
+        """Строки запроса или ORM-объекты: весь список проверяется одним вызовом pydantic-core."""
+        return self._adapter.validate_python(rows, from_attributes=True)
+
+    def dump_json(self, items: List[Schema]) -> bytes:
+        return self._adapter.dump_json(items)
+
+    def response(self, items: List[Schema], headers: Optional[Mapping[str, str]] = None) -> Response:
+        return Response(content=self.dump_json(items), media_type="application/json", headers=headers)
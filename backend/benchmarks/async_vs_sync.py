@@ -0,0 +1,95 @@
+"""Пропускная способность синхронного и асинхронного доступа к БД.
+
+Один и тот же запрос свободных слотов преподавателя выполняется рабочим
+асинхронным эндпоинтом GET /api/teachers/{id}/availability и его
+синхронной копией на SessionLocal, которую сценарий добавляет только в
+процессе бенчмарка. Для каждого уровня параллельности печатаются
+пропускная способность и задержки обоих вариантов рядом:
+
+    python -m benchmarks.async_vs_sync --levels 100 250 500 1000 --requests 3000
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from benchmarks.common import Timer, base_parser, make_client, register, summarize
+
+
+def mount_sync_route() -> None:
+    from app.core.database import get_db
+    from app.main import app
+    from app.models.availability import Availability
+
+    router = APIRouter(prefix="/bench/sync")
+
+    @router.get("/teachers/{teacher_id}/availability")
+    def sync_availability(teacher_id: int, db: Session = Depends(get_db)):
+        slots = db.query(Availability).filter(
+            Availability.teacher_id == teacher_id,
+            Availability.is_booked == False,
+            Availability.start_time > datetime.utcnow()
+        ).order_by(Availability.start_time, Availability.id).limit(100).all()
+        return [{"id": slot.id, "start_time": slot.start_time, "end_time": slot.end_time} for slot in slots]
+
+    app.include_router(router)
+
+
+async def run_level(client, path: str, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list = []
+    errors = 0
+
+    async def one_request():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    with Timer() as timer:
+        await asyncio.gather(*(one_request() for _ in range(total)))
+    summary = summarize(latencies, timer.elapsed)
+    summary["errors"] = errors
+    return summary
+
+
+async def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--slots", type=int, default=50)
+    args = parser.parse_args()
+    if args.url:
+        parser.error("синхронная копия эндпоинта монтируется только при запуске в процессе")
+
+    async with make_client(None, args.database_url) as client:
+        mount_sync_route()
+        teacher_id, headers = await register(client, f"bench-teacher-{int(time.time())}@example.com", "teacher")
+        start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        response = await client.post(f"/api/teachers/{teacher_id}/availability/bulk", headers=headers, json={
+            "slots": [
+                {"start_time": (start + timedelta(hours=i)).isoformat(), "end_time": (start + timedelta(hours=i, minutes=45)).isoformat()}
+                for i in range(args.slots)
+            ]
+        })
+        response.raise_for_status()
+
+        paths = {
+            "sync": f"/bench/sync/teachers/{teacher_id}/availability",
+            "async": f"/api/teachers/{teacher_id}/availability",
+        }
+        print(f"{'clients':>8} {'mode':>6} {'rps':>9} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'errors':>7}")
+        for level in args.levels:
+            for mode, path in paths.items():
+                summary = await run_level(client, path, args.requests, level)
+                print(f"{level:>8} {mode:>6} {summary['throughput_rps']:>9.1f} {summary['p50_ms']:>9.1f} "
+                      f"{summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f} {summary['errors']:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
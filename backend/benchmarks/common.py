@@ -0,0 +1,88 @@
+"""Общие помощники для нагрузочных сценариев.
+
+Без --url сценарии поднимают приложение в том же процессе поверх отдельной
+SQLite-базы, с --url работают с уже запущенным сервером.
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmark.db"
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--url", help="адрес запущенного API; по умолчанию приложение запускается в процессе")
+    parser.add_argument("--database-url", default=None, help="DATABASE_URL для запуска в процессе")
+    return parser
+
+
+def reset_database(database_url: Optional[str] = None):
+    """Пересоздает таблицы в базе бенчмарка и возвращает приложение."""
+    os.environ["DATABASE_URL"] = database_url or os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+    from app.main import app
+    from app.core.database import Base, engine
+    from app.models import (  # noqa: F401
+        archive, availability, booking, change_version, notification, teacher_stats, token_revocation, user
+    )
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return app
+
+
+def make_client(url: Optional[str], database_url: Optional[str] = None) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=120)
+
+    transport = httpx.ASGITransport(app=reset_database(database_url))
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120)
+
+
+async def register(client: httpx.AsyncClient, email: str, role: str, password: str = "benchpass") -> Tuple[int, Dict[str, str]]:
+    response = await client.post("/api/auth/register", json={
+        "email": email,
+        "full_name": email.split("@")[0],
+        "password": password,
+        "role": role,
+    })
+    response.raise_for_status()
+    data = response.json()
+    return data["user"]["id"], {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def print_summary(title: str, summary: Dict[str, float]) -> None:
+    fields = ", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in summary.items())
+    print(f"{title}: {fields}")
+
+
+class Timer:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
@@ -0,0 +1,451 @@
+"""Нагрузочный прогон всех маршрутов API с сохранением результатов.
+
+Работает поверх базы, заполненной benchmarks.seed. Для каждого сценария
+отправляет --requests запросов с параллельностью --concurrency и печатает
+p50/p95/p99, пропускную способность, долю ошибок и среднее число
+SQL-запросов на HTTP-запрос (только при запуске в процессе). Поток SSE
+измеряется только с --url: ASGITransport отдает ответ целиком, а поток не
+заканчивается. Результаты
+сохраняются в benchmarks/results/ и сравниваются с прошлым прогоном на
+том же диалекте БД:
+
+    python -m benchmarks.seed --database-url sqlite:///./benchmark.db --teachers 1000 --students 5000 \\
+        --slots 100000 --bookings 50000
+    python -m benchmarks.harness --database-url sqlite:///./benchmark.db --concurrency 50
+    python -m benchmarks.harness --database-url sqlite:///./benchmark.db --only bookings. --compare benchmarks/results/<file>.json
+"""
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.common import Timer, base_parser, summarize
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SESSION_USERS = 10
+
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    teachers: List[Tuple[int, Dict[str, str]]] = field(default_factory=list)
+    students: List[Tuple[int, Dict[str, str]]] = field(default_factory=list)
+    refresh_tokens: List[str] = field(default_factory=list)
+    admin: Dict[str, str] = field(default_factory=dict)
+    teacher_count: int = 0
+    student_count: int = 0
+    rng: random.Random = field(default_factory=random.Random)
+    next_hour: Dict[int, int] = field(default_factory=dict)
+    # Слоты далеко в будущем, свои для каждого прогона, чтобы не пересекаться с прошлыми
+    slot_base: datetime = field(default_factory=lambda: datetime(2100, 1, 1) + timedelta(days=365 * (int(time.time()) % 7000)))
+
+    def teacher(self) -> Tuple[int, Dict[str, str]]:
+        return self.rng.choice(self.teachers)
+
+    def student(self) -> Tuple[int, Dict[str, str]]:
+        return self.rng.choice(self.students)
+
+    def new_slot(self, teacher_id: int) -> dict:
+        hour = self.next_hour.get(teacher_id, 0)
+        self.next_hour[teacher_id] = hour + 1
+        start = self.slot_base + timedelta(hours=hour)
+        return {"start_time": start.isoformat(), "end_time": (start + timedelta(minutes=30)).isoformat()}
+
+    async def create_slots(self, count: int) -> List[Tuple[dict, Dict[str, str]]]:
+        """Создает слоты у преподавателей сессии; возвращает (слот, заголовки владельца)."""
+        created = []
+        for index in range(count):
+            teacher_id, headers = self.teachers[index % len(self.teachers)]
+            response = await self.client.post(
+                f"/api/teachers/{teacher_id}/availability", headers=headers, json=self.new_slot(teacher_id)
+            )
+            response.raise_for_status()
+            created.append((response.json(), headers))
+        return created
+
+    async def create_bookings(self, count: int) -> List[Tuple[int, Dict[str, str], Dict[str, str]]]:
+        """Создает бронирования; возвращает (id, заголовки студента, заголовки преподавателя)."""
+        bookings = []
+        for slot, teacher_headers in await self.create_slots(count):
+            _, student_headers = self.student()
+            response = await self.client.post("/api/bookings", headers=student_headers, json={"availability_id": slot["id"]})
+            response.raise_for_status()
+            bookings.append((response.json()["id"], student_headers, teacher_headers))
+        return bookings
+
+    async def register_students(self, count: int) -> List[Tuple[Dict[str, str], str]]:
+        """Регистрирует новых студентов; возвращает (заголовки, refresh-токен)."""
+        sessions = []
+        for index in range(count):
+            response = await self.client.post("/api/auth/register", json={
+                "email": f"harness-{time.time_ns()}-{index}@example.com", "full_name": "Harness User",
+                "password": "benchpass", "role": "student",
+            })
+            response.raise_for_status()
+            data = response.json()
+            sessions.append(({"Authorization": f"Bearer {data['access_token']}"}, data["refresh_token"]))
+        return sessions
+
+
+Request = Callable[[Context, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: Request
+    prepare: Optional[Callable[[Context, int], Awaitable[list]]] = None
+    remote_only: bool = False
+
+
+def window(days: int) -> Tuple[str, str]:
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.isoformat(), (start + timedelta(days=days)).isoformat()
+
+
+def build_scenarios() -> List[Scenario]:
+    prepared: Dict[str, list] = {}
+
+    def with_prepared(name: str, request: Callable[[Context, object], Awaitable[httpx.Response]]) -> Request:
+        async def run(ctx: Context, index: int) -> httpx.Response:
+            return await request(ctx, prepared[name][index])
+        return run
+
+    def store(name: str, factory: Callable[[Context, int], Awaitable[list]]):
+        async def prepare(ctx: Context, count: int) -> list:
+            prepared[name] = await factory(ctx, count)
+            return prepared[name]
+        return prepare
+
+    async def conditional_availability(ctx: Context, index: int) -> httpx.Response:
+        teacher_id, _ = ctx.teachers[0]
+        first = await ctx.client.get(f"/api/teachers/{teacher_id}/availability") if index == 0 else None
+        if first is not None:
+            prepared["etag"] = first.headers.get("etag", "")
+        return await ctx.client.get(
+            f"/api/teachers/{teacher_id}/availability", headers={"If-None-Match": prepared.get("etag", "")}
+        )
+
+    async def update_slot(ctx: Context, item) -> httpx.Response:
+        slot, headers = item
+        end_time = datetime.fromisoformat(slot["start_time"]) + timedelta(minutes=45)
+        return await ctx.client.put(
+            f"/api/teachers/availability/{slot['id']}", headers=headers, json={"end_time": end_time.isoformat()}
+        )
+
+    async def delete_slot(ctx: Context, item) -> httpx.Response:
+        slot, headers = item
+        return await ctx.client.delete(f"/api/teachers/availability/{slot['id']}", headers=headers)
+
+    async def book_slot(ctx: Context, item) -> httpx.Response:
+        slot, _ = item
+        _, headers = ctx.student()
+        return await ctx.client.post("/api/bookings", headers=headers, json={"availability_id": slot["id"]})
+
+    async def confirm_booking(ctx: Context, item) -> httpx.Response:
+        booking_id, _, teacher_headers = item
+        return await ctx.client.put(f"/api/bookings/{booking_id}/confirm", headers=teacher_headers)
+
+    async def cancel_booking(ctx: Context, item) -> httpx.Response:
+        booking_id, student_headers, _ = item
+        return await ctx.client.delete(f"/api/bookings/{booking_id}", headers=student_headers)
+
+    def random_teacher_id(ctx: Context) -> int:
+        return ctx.rng.randint(1, ctx.teacher_count)
+
+    async def post_bulk(ctx: Context, index: int) -> httpx.Response:
+        teacher_id, headers = ctx.teacher()
+        slots = [ctx.new_slot(teacher_id) for _ in range(10)]
+        return await ctx.client.post(f"/api/teachers/{teacher_id}/availability/bulk", headers=headers, json={"slots": slots})
+
+    async def post_slot(ctx: Context, index: int) -> httpx.Response:
+        teacher_id, headers = ctx.teacher()
+        return await ctx.client.post(f"/api/teachers/{teacher_id}/availability", headers=headers, json=ctx.new_slot(teacher_id))
+
+    async def logout(ctx: Context, item) -> httpx.Response:
+        headers, refresh_token = item
+        return await ctx.client.post("/api/auth/logout", headers=headers, json={"refresh_token": refresh_token})
+
+    async def change_password(ctx: Context, item) -> httpx.Response:
+        headers, _ = item
+        return await ctx.client.post("/api/auth/change-password", headers=headers, json={
+            "current_password": "benchpass", "new_password": "benchpass2",
+        })
+
+    async def teacher_events(ctx: Context, index: int) -> httpx.Response:
+        # Время до первого события (retry) после подписки
+        async with ctx.client.stream("GET", f"/api/teachers/{random_teacher_id(ctx)}/events") as response:
+            async for _ in response.aiter_text():
+                break
+        return response
+
+    async def export(ctx: Context, index: int, kind: str) -> httpx.Response:
+        start, end = window(7)
+        return await ctx.client.get(f"/api/admin/exports/{kind}", headers=ctx.admin, params={
+            "format": ctx.rng.choice(["csv", "ndjson"]), "from": start, "to": end,
+        })
+
+    async def grid(ctx: Context, index: int) -> httpx.Response:
+        start, end = window(7)
+        ids = [random_teacher_id(ctx) for _ in range(10)]
+        return await ctx.client.get("/api/availability/grid", params={"teacher_id": ids, "from": start, "to": end})
+
+    return [
+        Scenario("health", lambda ctx, i: ctx.client.get("/health")),
+        Scenario("auth.register", lambda ctx, i: ctx.client.post("/api/auth/register", json={
+            "email": f"harness-{time.time_ns()}-{i}@example.com", "full_name": "Harness User",
+            "password": "benchpass", "role": "student",
+        })),
+        Scenario("auth.login", lambda ctx, i: ctx.client.post("/api/auth/login", json={
+            "email": f"student{ctx.rng.randint(1, ctx.student_count)}@seed.example.com", "password": "benchpass",
+        })),
+        Scenario("auth.refresh", lambda ctx, i: rotate_refresh_token(ctx)),
+        Scenario("auth.me", lambda ctx, i: ctx.client.get("/api/auth/users/me", headers=ctx.student()[1])),
+        Scenario("auth.logout", with_prepared("logout", logout), store("logout", lambda ctx, n: ctx.register_students(n))),
+        Scenario("auth.change_password", with_prepared("password", change_password),
+                 store("password", lambda ctx, n: ctx.register_students(n))),
+        Scenario("teachers.list", lambda ctx, i: ctx.client.get("/api/teachers", params={"limit": 50})),
+        Scenario("teachers.search", lambda ctx, i: ctx.client.get("/api/teachers", params={
+            "q": ctx.rng.choice(["Иван", "Петр", "Smith", "Mar", "Emma", "Сок"]), "limit": 20,
+        })),
+        Scenario("teachers.profile", lambda ctx, i: ctx.client.get(f"/api/teachers/{random_teacher_id(ctx)}")),
+        Scenario("teachers.events", teacher_events, remote_only=True),
+        Scenario("teachers.availability", lambda ctx, i: ctx.client.get(
+            f"/api/teachers/{random_teacher_id(ctx)}/availability", params={"limit": 50}
+        )),
+        Scenario("teachers.availability.304", conditional_availability),
+        Scenario("teachers.create_availability", post_slot),
+        Scenario("teachers.bulk_availability", post_bulk),
+        Scenario("teachers.update_availability", with_prepared("update", update_slot),
+                 store("update", lambda ctx, n: ctx.create_slots(n))),
+        Scenario("teachers.delete_availability", with_prepared("delete", delete_slot),
+                 store("delete", lambda ctx, n: ctx.create_slots(n))),
+        Scenario("availability.search", lambda ctx, i: ctx.client.get("/api/availability/search", params={
+            "min_duration": ctx.rng.choice([30, 60]), "limit": 50,
+        })),
+        Scenario("availability.search.per_teacher", lambda ctx, i: ctx.client.get("/api/availability/search", params={
+            "teacher_id": [random_teacher_id(ctx) for _ in range(20)], "per_teacher": "true",
+        })),
+        Scenario("availability.grid", grid),
+        Scenario("bookings.create", with_prepared("book", book_slot),
+                 store("book", lambda ctx, n: ctx.create_slots(n))),
+        Scenario("bookings.list.student", lambda ctx, i: ctx.client.get("/api/bookings", headers=ctx.student()[1])),
+        Scenario("bookings.list.teacher", lambda ctx, i: ctx.client.get("/api/bookings", headers=ctx.teacher()[1])),
+        Scenario("bookings.confirm", with_prepared("confirm", confirm_booking),
+                 store("confirm", lambda ctx, n: ctx.create_bookings(n))),
+        Scenario("bookings.cancel", with_prepared("cancel", cancel_booking),
+                 store("cancel", lambda ctx, n: ctx.create_bookings(n))),
+        Scenario("students.my_bookings", lambda ctx, i: ctx.client.get("/api/students/my-bookings", headers=ctx.student()[1])),
+        Scenario("admin.export.bookings", lambda ctx, i: export(ctx, i, "bookings")),
+        Scenario("admin.export.availability", lambda ctx, i: export(ctx, i, "availability")),
+        Scenario("admin.analytics", lambda ctx, i: ctx.client.get("/api/admin/analytics/utilization", headers=ctx.admin, params={
+            "teacher_id": [random_teacher_id(ctx) for _ in range(20)],
+        })),
+    ]
+
+
+class QueryCounter:
+    """Считает SQL-запросы движков приложения, включая реплику (только при запуске в процессе)."""
+
+    def __init__(self):
+        self.count = 0
+        self.enabled = False
+
+    def install(self) -> None:
+        from sqlalchemy import event
+        from app.core.database import async_engine, replica_engine
+
+        def _count(*args, **kwargs):
+            self.count += 1
+
+        for engine in {async_engine, replica_engine}:
+            event.listen(engine.sync_engine, "before_cursor_execute", _count)
+        self.enabled = True
+
+
+async def run_scenario(ctx: Context, scenario: Scenario, total: int, concurrency: int, queries: QueryCounter) -> dict:
+    if scenario.prepare is not None:
+        await scenario.prepare(ctx, total)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await scenario.request(ctx, index)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    queries_before = queries.count
+    with Timer() as timer:
+        # Первый запрос отдельно: условный GET запоминает в нем ETag
+        await one(0)
+        await asyncio.gather(*(one(index) for index in range(1, total)))
+
+    summary = summarize(latencies, timer.elapsed)
+    summary["errors"] = sum(count for code, count in statuses.items() if code >= 400)
+    summary["statuses"] = {str(code): count for code, count in sorted(statuses.items())}
+    summary["queries_per_request"] = (queries.count - queries_before) / total if queries.enabled else None
+    return summary
+
+
+async def rotate_refresh_token(ctx: Context) -> httpx.Response:
+    # Refresh-токен одноразовый: берем свободный из пула и возвращаем новый
+    response = await ctx.client.post("/api/auth/refresh", json={"refresh_token": ctx.refresh_tokens.pop()})
+    if response.status_code == 200:
+        ctx.refresh_tokens.append(response.json()["refresh_token"])
+    return response
+
+
+async def open_session(ctx: Context, refresh_sessions: int) -> None:
+    for role, target in (("teacher", ctx.teachers), ("student", ctx.students)):
+        count = ctx.teacher_count if role == "teacher" else ctx.student_count
+        for number in ctx.rng.sample(range(1, count + 1), min(SESSION_USERS, count)):
+            response = await ctx.client.post("/api/auth/login", json={
+                "email": f"{role}{number}@seed.example.com", "password": "benchpass",
+            })
+            response.raise_for_status()
+            data = response.json()
+            target.append((data["user"]["id"], {"Authorization": f"Bearer {data['access_token']}"}))
+            ctx.refresh_tokens.append(data["refresh_token"])
+
+    # Администратор для выгрузок и аналитики
+    response = await ctx.client.post("/api/auth/register", json={
+        "email": f"harness-admin-{time.time_ns()}@example.com", "full_name": "Harness Admin",
+        "password": "benchpass", "role": "admin",
+    })
+    response.raise_for_status()
+    ctx.admin = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # По свободному refresh-токену на каждый параллельный запрос сценария auth.refresh
+    while len(ctx.refresh_tokens) < refresh_sessions:
+        response = await ctx.client.post("/api/auth/login", json={
+            "email": f"student{ctx.rng.randint(1, ctx.student_count)}@seed.example.com", "password": "benchpass",
+        })
+        response.raise_for_status()
+        ctx.refresh_tokens.append(response.json()["refresh_token"])
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_result(dialect: str, exclude: Path) -> Optional[Path]:
+    candidates = sorted(path for path in RESULTS_DIR.glob(f"*-{dialect}.json") if path != exclude)
+    return candidates[-1] if candidates else None
+
+
+def print_comparison(current: dict, baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\ncompared with {baseline_path.name} (revision {baseline.get('revision')}):")
+    print(f"{'scenario':<34} {'p50 Δ%':>8} {'p95 Δ%':>8} {'p99 Δ%':>8} {'rps Δ%':>8}")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+
+        def delta(key: str) -> str:
+            return f"{(result[key] - old[key]) / old[key] * 100:+.1f}" if old[key] else "n/a"
+
+        print(f"{name:<34} {delta('p50_ms'):>8} {delta('p95_ms'):>8} {delta('p99_ms'):>8} {delta('throughput_rps'):>8}")
+
+
+def count_seeded(engine, role: str) -> int:
+    from sqlalchemy import func, select
+    from app.models.user import User
+
+    with engine.connect() as connection:
+        count = connection.scalar(select(func.count()).where(User.email.like(f"{role}%@seed.example.com")))
+    if not count:
+        raise SystemExit("база пуста — сначала заполните ее: python -m benchmarks.seed")
+    return count
+
+
+async def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--only", nargs="*", default=None, help="префиксы имен сценариев")
+    parser.add_argument("--teachers", type=int, default=None, help="число засеянных преподавателей; с --url обязательно")
+    parser.add_argument("--students", type=int, default=None, help="число засеянных студентов; с --url обязательно")
+    parser.add_argument("--compare", type=Path, default=None, help="файл результатов для сравнения")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    queries = QueryCounter()
+    if args.url:
+        if not (args.teachers and args.students):
+            parser.error("с --url укажите --teachers и --students, с которыми запускался benchmarks.seed")
+        client = httpx.AsyncClient(base_url=args.url, timeout=120)
+        dialect = os.environ.get("BENCH_DIALECT", "remote")
+    else:
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+        # В отличие от других сценариев база не пересоздается: она заполнена benchmarks.seed
+        from app.main import app
+        from app.core.database import engine
+        queries.install()
+        dialect = engine.dialect.name
+        args.teachers = args.teachers or count_seeded(engine, "teacher")
+        args.students = args.students or count_seeded(engine, "student")
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+        # Фоновые задачи приложения не запускаются; список отзыва загружаем, как при старте воркера
+        from app.services.token_revocation import token_revocations
+        await token_revocations.reload()
+
+    async with client:
+        ctx = Context(client=client, rng=random.Random(args.seed))
+        ctx.teacher_count = args.teachers
+        ctx.student_count = args.students
+        await open_session(ctx, args.concurrency)
+
+        results = {}
+        for scenario in build_scenarios():
+            if args.only and not any(scenario.name.startswith(prefix) for prefix in args.only):
+                continue
+            if scenario.remote_only and not args.url:
+                print(f"{scenario.name:<34} skipped: only with --url")
+                continue
+            summary = await run_scenario(ctx, scenario, args.requests, args.concurrency, queries)
+            results[scenario.name] = summary
+            qpr = summary["queries_per_request"]
+            print(f"{scenario.name:<34} rps={summary['throughput_rps']:>8.1f} p50={summary['p50_ms']:>7.1f} "
+                  f"p95={summary['p95_ms']:>7.1f} p99={summary['p99_ms']:>7.1f} errors={summary['errors']:>4} "
+                  f"queries/req={'n/a' if qpr is None else f'{qpr:.2f}'}")
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "dialect": dialect,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "results": results,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}-{dialect}.json"
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\nresults saved to {path}")
+
+    baseline = args.compare or latest_result(dialect, path)
+    if baseline:
+        print_comparison(report, baseline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""Задержка списка бронирований во время волны входов в систему.
+
+Сначала измеряется GET /api/bookings без нагрузки, затем тот же запрос
+параллельно с массовыми POST /api/auth/login. Для сравнения «до/после»
+запустите сценарий на двух версиях кода:
+
+    python -m benchmarks.login_storm --logins 400 --concurrency 200
+"""
+import asyncio
+import time
+
+from benchmarks.common import Timer, base_parser, make_client, print_summary, register, summarize
+
+
+async def poll_bookings(client, headers, stop: asyncio.Event, latencies: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/bookings", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def login_storm(client, email: str, total: int, concurrency: int) -> int:
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one_login():
+        nonlocal failures
+        async with semaphore:
+            response = await client.post("/api/auth/login", json={"email": email, "password": "benchpass"})
+            if response.status_code != 200:
+                failures += 1
+
+    await asyncio.gather(*(one_login() for _ in range(total)))
+    return failures
+
+
+async def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--pollers", type=int, default=4)
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    async with make_client(args.url, args.database_url) as client:
+        suffix = int(time.time())
+        await register(client, f"storm-{suffix}@example.com", "student")
+        _, headers = await register(client, f"poller-{suffix}@example.com", "student")
+
+        for phase in ("idle", "login storm"):
+            stop = asyncio.Event()
+            latencies: list = []
+            pollers = [asyncio.create_task(poll_bookings(client, headers, stop, latencies)) for _ in range(args.pollers)]
+            with Timer() as timer:
+                if phase == "idle":
+                    await asyncio.sleep(args.baseline_seconds)
+                else:
+                    failures = await login_storm(client, f"storm-{suffix}@example.com", args.logins, args.concurrency)
+                stop.set()
+                await asyncio.gather(*pollers)
+            print_summary(f"GET /api/bookings ({phase})", summarize(latencies, timer.elapsed))
+
+        print(f"logins: {args.logins} in {timer.elapsed:.2f}s, failures={failures}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
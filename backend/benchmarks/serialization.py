@@ -0,0 +1,103 @@
+"""Процессорное время сериализации больших списков: обычный путь FastAPI и ListSerializer.
+
+Поднимает в процессе приложение с парами маршрутов над одинаковыми
+данными без БД: строки бронирований (как из get_user_bookings) и
+ORM-объекты слотов. Обычный маршрут отдает список через response_model,
+быстрый — через ListSerializer. Печатает CPU-время на запрос и разницу.
+
+    python -m benchmarks.serialization --items 500 --requests 200
+"""
+import argparse
+import asyncio
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+from app.models.availability import Availability
+from app.models.booking import BookingStatus
+from app.models import user  # noqa: F401  (связи Availability -> User)
+from app.schemas.availability import AvailabilityResponse
+from app.schemas.booking import BookingWithDetails
+from app.utils.serialization import ListSerializer
+
+
+class Row(namedtuple("Row", BookingWithDetails.model_fields)):
+    """Имитирует строку результата SQLAlchemy."""
+
+    @property
+    def _mapping(self):
+        return self._asdict()
+
+
+def build_app(items: int) -> FastAPI:
+    start = datetime(2030, 1, 1)
+    rows = [
+        Row(
+            availability_id=index, id=index, student_id=index % 97, teacher_id=index % 13,
+            status=BookingStatus.confirmed, created_at=start, start_time=start + timedelta(hours=index),
+            end_time=start + timedelta(hours=index, minutes=45), teacher_name=f"Teacher {index % 13}",
+            student_name=f"Student {index % 97}",
+        )
+        for index in range(items)
+    ]
+    slots = [
+        Availability(id=index, teacher_id=1, start_time=start + timedelta(hours=index),
+                     end_time=start + timedelta(hours=index, minutes=30), is_booked=False)
+        for index in range(items)
+    ]
+    bookings = ListSerializer(BookingWithDetails)
+    availability = ListSerializer(AvailabilityResponse)
+    app = FastAPI()
+
+    @app.get("/default/bookings", response_model=List[BookingWithDetails])
+    async def default_bookings():
+        return [BookingWithDetails(**row._mapping) for row in rows]
+
+    @app.get("/fast/bookings", response_model=List[BookingWithDetails])
+    async def fast_bookings():
+        return bookings.response(bookings.from_rows(rows))
+
+    @app.get("/default/availability", response_model=List[AvailabilityResponse])
+    async def default_availability():
+        return slots
+
+    @app.get("/fast/availability", response_model=List[AvailabilityResponse])
+    async def fast_availability():
+        return availability.response(availability.from_rows(slots))
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    body = (await client.get(path)).content
+    started = time.process_time()
+    for _ in range(requests):
+        response = await client.get(path)
+        assert response.content == body
+    return (time.process_time() - started) / requests
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=build_app(args.items))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in ("bookings", "availability"):
+            default_body = (await client.get(f"/default/{name}")).content
+            if default_body != (await client.get(f"/fast/{name}")).content:
+                raise SystemExit(f"{name}: ответы обычного и быстрого пути различаются")
+            default = await measure(client, f"/default/{name}", args.requests)
+            fast = await measure(client, f"/fast/{name}", args.requests)
+            print(f"{name}: items={args.items}, default_cpu_ms={default * 1000:.2f}, fast_cpu_ms={fast * 1000:.2f}, "
+                  f"saving={(1 - fast / default) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
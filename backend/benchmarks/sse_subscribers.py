@@ -0,0 +1,115 @@
+"""Тысячи простаивающих SSE-подписчиков на события слотов.
+
+Открывает --subscribers соединений к GET /api/teachers/{id}/events, затем
+преподаватель создает --events слотов. Сценарий печатает время подключения,
+потребление памяти, долю доставленных событий и задержку доставки от
+POST до получения каждым подписчиком.
+
+Без --url поднимает uvicorn в этом же процессе (ASGITransport не умеет
+потоковые ответы). Для проверки рассылки между воркерами:
+
+    python -m app.services.pubsub_hub --port 8765
+    PUBSUB_HUB_URL=tcp://127.0.0.1:8765 uvicorn app.main:app --workers 4 --port 8000
+    python -m benchmarks.sse_subscribers --url http://127.0.0.1:8000 --subscribers 5000
+"""
+import asyncio
+import json
+import resource
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.common import Timer, base_parser, percentile, register, reset_database
+
+
+async def start_server(database_url, port: int):
+    import uvicorn
+
+    app = reset_database(database_url)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def subscriber(client, teacher_id: int, connected: asyncio.Event, counter: dict, received: list) -> None:
+    async with client.stream("GET", f"/api/teachers/{teacher_id}/events") as response:
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("retry:"):
+                counter["connected"] += 1
+                if counter["connected"] == counter["target"]:
+                    connected.set()
+            elif line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event == "slot_created":
+                received.append((time.perf_counter(), json.loads(line[len("data: "):])["id"]))
+
+
+async def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = task = None
+    url = args.url
+    if not url:
+        server, task = await start_server(args.database_url, args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    limits = httpx.Limits(max_connections=args.subscribers + 20, max_keepalive_connections=args.subscribers + 20)
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        teacher_id, headers = await register(client, f"sse-teacher-{int(time.time())}@example.com", "teacher")
+
+        connected = asyncio.Event()
+        counter = {"connected": 0, "target": args.subscribers}
+        received: list = []
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with Timer() as connect_timer:
+            subscribers = [
+                asyncio.create_task(subscriber(client, teacher_id, connected, counter, received))
+                for _ in range(args.subscribers)
+            ]
+            await connected.wait()
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"subscribers={args.subscribers} connected in {connect_timer.elapsed:.2f}s, "
+              f"max RSS +{(rss_after - rss_before) / 1024:.1f} MiB")
+
+        published = {}
+        start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        for index in range(args.events):
+            sent_at = time.perf_counter()
+            response = await client.post(f"/api/teachers/{teacher_id}/availability", headers=headers, json={
+                "start_time": (start + timedelta(hours=index)).isoformat(),
+                "end_time": (start + timedelta(hours=index, minutes=30)).isoformat(),
+            })
+            response.raise_for_status()
+            published[response.json()["id"]] = sent_at
+            await asyncio.sleep(0.05)
+
+        expected = args.subscribers * args.events
+        deadline = time.perf_counter() + 30
+        while len(received) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+
+        # Задержка — от начала POST, создавшего слот, до получения события
+        latencies = [received_at - published[slot_id] for received_at, slot_id in received if slot_id in published]
+        print(f"events={args.events}, delivered={len(received)}/{expected}, "
+              f"p50_ms={percentile(latencies, 50) * 1000:.1f}, p95_ms={percentile(latencies, 95) * 1000:.1f}, "
+              f"p99_ms={percentile(latencies, 99) * 1000:.1f}")
+
+        for item in subscribers:
+            item.cancel()
+        await asyncio.gather(*subscribers, return_exceptions=True)
+
+    if server is not None:
+        server.should_exit = True
+        await task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
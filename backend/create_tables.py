@@ -1,19 +1,34 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.core.database import Base
-from app.models.user import User, UserRole
-from app.models.availability import Availability
+from app.core.database import Base, SessionLocal, create_missing_indexes, engine
+from app.models.user import User, UserRole, install_name_search
+from app.models.availability import Availability, install_overlap_guard
 from app.models.booking import Booking, BookingStatus
-from app.core.config import settings
-
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  
-)
+from app.models.notification import NotificationOutbox
+from app.models.change_version import ChangeVersion
+from app.models.teacher_stats import TeacherDailyStats
+from app.models.archive import AvailabilityArchive, BookingArchive
+from app.models.token_revocation import TokenRevocation
+from app.services.archive_service import enable_sqlite_autoincrement
+from app.services.availability_service import remove_overlapping_slots
+from app.services.booking_service import cancel_duplicate_bookings
+from app.services.utilization_service import UtilizationService
 
 Base.metadata.create_all(bind=engine)
+with engine.begin() as connection:
+    enable_sqlite_autoincrement(connection)
+    # Уникальный индекс активных бронирований не создастся поверх дублей
+    cancelled = cancel_duplicate_bookings(connection)
+    if cancelled:
+        UtilizationService.rebuild(connection)
+        print(f"Отменено повторных бронирований одного слота: {cancelled}")
+create_missing_indexes(engine)
+# Индекс поиска по имени и запрет пересечений слотов для баз, созданных до их появления
+with engine.begin() as connection:
+    install_name_search(connection)
+    removed, conflicts = remove_overlapping_slots(connection)
+    if removed or conflicts:
+        print(f"Удалено пересекающихся слотов: {removed}, пересечений забронированных слотов: {conflicts}")
+    install_overlap_guard(connection)
 
-SessionLocal = sessionmaker(bind=engine)
 db = SessionLocal()
 
 if not db.query(User).filter_by(email="dan@gmail.com").first():
@@ -0,0 +1,72 @@
+"""Общая тестовая база: временный SQLite-файл и реплика — тот же файл только для чтения.
+
+Переменные окружения задаются до импорта приложения: настройки и движки
+создаются при импорте app.core.
+"""
+import asyncio
+import os
+import tempfile
+
+_DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DATABASE_PATH}"
+os.environ["DATABASE_REPLICA_URL"] = f"sqlite:///file:{_DATABASE_PATH}?mode=ro&uri=true"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from app.core.database import Base, async_engine, engine, replica_engine  # noqa: E402
+from app.models import (  # noqa: E402,F401
+    archive, availability, booking, change_version, notification, teacher_stats, token_revocation, user
+)
+
+
+async def _dispose_engines() -> None:
+    await async_engine.dispose()
+    await replica_engine.dispose()
+
+
+async def _reload_revocations() -> None:
+    from app.services.token_revocation import token_revocations
+
+    # Как при старте воркера: id пользователей в новой базе повторяются
+    await token_revocations.reload()
+    await _dispose_engines()
+
+
+def reset_database() -> None:
+    """Пересоздает таблицы и очищает кэши процесса."""
+    from app.api.deps import user_cache
+    from app.services.teacher_directory import teacher_directory
+    from app.utils.jwt import token_cache
+
+    asyncio.run(_dispose_engines())
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    token_cache.clear()
+    teacher_directory.invalidate()
+    asyncio.run(_reload_revocations())
+
+
+@pytest.fixture(autouse=True)
+def database():
+    reset_database()
+    yield
+    asyncio.run(_dispose_engines())
+
+
+def make_client() -> httpx.AsyncClient:
+    from app.main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def register(client: httpx.AsyncClient, email: str, role: str, password: str = "password1") -> dict:
+    response = await client.post("/api/auth/register", json={
+        "email": email, "full_name": email.split("@")[0], "password": password, "role": role
+    })
+    response.raise_for_status()
+    return response.json()
+
+
+def auth(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
@@ -0,0 +1,32 @@
+"""Выгрузки администратора: окно по времени с часовым поясом."""
+import asyncio
+from datetime import datetime, timedelta
+
+from app.core.database import AsyncSessionLocal
+from app.models.availability import Availability
+from conftest import auth, make_client, register
+
+
+async def _export(params: dict) -> list:
+    async with make_client() as client:
+        admin = await register(client, "admin@example.com", "admin")
+        teacher = await register(client, "teacher@example.com", "teacher")
+        async with AsyncSessionLocal() as db:
+            start = datetime(2030, 1, 1, 9)
+            db.add_all([
+                Availability(teacher_id=teacher["user"]["id"], start_time=start + timedelta(hours=index),
+                             end_time=start + timedelta(hours=index, minutes=30))
+                for index in range(3)
+            ])
+            await db.commit()
+        response = await client.get(
+            "/api/admin/exports/availability", params={"format": "csv", **params}, headers=auth(admin)
+        )
+    assert response.status_code == 200
+    return [line.split(",")[3] for line in response.text.splitlines()[1:]]
+
+
+def test_export_window_accepts_aware_bounds():
+    # Слоты в 09:00, 10:00 и 11:00 UTC
+    aware = asyncio.run(_export({"from": "2030-01-01T12:30:00+03:00", "to": "2030-01-01T11:00:00+00:00"}))
+    assert aware == ["2030-01-01T10:00:00"]
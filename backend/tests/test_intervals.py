@@ -0,0 +1,87 @@
+"""Запрет пересечения слотов: IntervalSet и триггеры SQLite."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from app.core.database import engine
+from app.models.availability import Availability, SLOT_OVERLAP_MESSAGE
+from app.models.user import User, UserRole
+from app.utils.intervals import IntervalSet
+
+BASE = datetime(2030, 1, 1, 9)
+
+
+def at(hours: float) -> datetime:
+    return BASE + timedelta(hours=hours)
+
+
+def test_touching_intervals_do_not_overlap():
+    intervals = IntervalSet([(at(1), at(2))])
+    assert intervals.add(at(0), at(1))
+    assert intervals.add(at(2), at(3))
+    assert len(intervals) == 3
+
+
+def test_nested_intervals_overlap():
+    intervals = IntervalSet([(at(1), at(3))])
+    assert not intervals.add(at(1.5), at(2))
+    assert not intervals.add(at(0), at(4))
+    assert len(intervals) == 1
+
+
+def test_partially_overlapping_intervals_overlap():
+    intervals = IntervalSet([(at(1), at(2)), (at(3), at(4))])
+    assert intervals.overlaps(at(0.5), at(1.5))
+    assert intervals.overlaps(at(1.5), at(3.5))
+    assert intervals.overlaps(at(3.5), at(5))
+    assert not intervals.overlaps(at(2), at(3))
+
+
+def test_overlapping_input_is_merged():
+    intervals = IntervalSet([(at(2), at(4)), (at(1), at(3)), (at(5), at(6))])
+    assert len(intervals) == 2
+    assert intervals.overlaps(at(3.5), at(4.5))
+    assert intervals.add(at(4), at(5))
+
+
+def test_aware_bounds_are_compared_in_utc():
+    intervals = IntervalSet([(at(1), at(2))])
+    moscow = timezone(timedelta(hours=3))
+    assert intervals.overlaps(at(4).replace(tzinfo=moscow), at(5).replace(tzinfo=moscow))
+    assert not intervals.overlaps(at(5).replace(tzinfo=moscow), at(6).replace(tzinfo=moscow))
+
+
+def _create_slots(connection, *hours) -> int:
+    teacher_id = connection.execute(insert(User).values(
+        email="teacher@example.com", full_name="Teacher", hashed_password="x", role=UserRole.teacher
+    )).inserted_primary_key[0]
+    for start in hours:
+        connection.execute(insert(Availability).values(
+            teacher_id=teacher_id, start_time=at(start), end_time=at(start + 1), is_booked=False
+        ))
+    return teacher_id
+
+
+def test_trigger_rejects_overlapping_insert():
+    with engine.begin() as connection:
+        teacher_id = _create_slots(connection, 0)
+        # Соседний слот допустим
+        connection.execute(insert(Availability).values(
+            teacher_id=teacher_id, start_time=at(1), end_time=at(2), is_booked=False
+        ))
+    with pytest.raises(IntegrityError, match=SLOT_OVERLAP_MESSAGE):
+        with engine.begin() as connection:
+            connection.execute(insert(Availability).values(
+                teacher_id=teacher_id, start_time=at(0.5), end_time=at(1.5), is_booked=False
+            ))
+
+
+def test_trigger_rejects_overlapping_update():
+    with engine.begin() as connection:
+        _create_slots(connection, 0, 2)
+    with pytest.raises(IntegrityError, match=SLOT_OVERLAP_MESSAGE):
+        with engine.begin() as connection:
+            connection.execute(
+                update(Availability).where(Availability.start_time == at(2)).values(start_time=at(0.5))
+            )
@@ -0,0 +1,83 @@
+"""Диспетчер outbox: итоги отправки и потеря аренды."""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert, select, update
+from app.core.database import engine
+from app.models.notification import NotificationOutbox, OutboxStatus
+from app.services.outbox_dispatcher import OutboxDispatcher
+from app.utils.email import OutgoingEmail
+
+
+class FakeMailer:
+    """Возвращает заданные ошибки по адресату; on_send вызывается до «отправки»."""
+
+    def __init__(self, errors: dict, on_send: Optional[Callable[[], None]] = None):
+        self.errors = errors
+        self.on_send = on_send
+        self.sent: List[str] = []
+
+    def send_batch(self, messages: List[OutgoingEmail]) -> List[Optional[str]]:
+        if self.on_send:
+            self.on_send()
+        self.sent.extend(message.to_email for message in messages)
+        return [self.errors.get(message.to_email) for message in messages]
+
+
+def _enqueue(*recipients: str, attempts: int = 0) -> None:
+    now = datetime.utcnow() - timedelta(seconds=1)
+    with engine.begin() as connection:
+        for recipient in recipients:
+            connection.execute(insert(NotificationOutbox).values(
+                kind="test", recipient=recipient, subject="s", body="b", status=OutboxStatus.pending,
+                attempts=attempts, next_attempt_at=now, created_at=now
+            ))
+
+
+def _outbox() -> dict:
+    with engine.connect() as connection:
+        return {row.recipient: row for row in connection.execute(select(NotificationOutbox))}
+
+
+def test_dispatch_records_results():
+    _enqueue("ok@example.com", "retry@example.com")
+    _enqueue("last@example.com", attempts=2)
+    mailer = FakeMailer({"retry@example.com": "timeout", "last@example.com": "rejected"})
+    dispatcher = OutboxDispatcher(mailer=mailer, max_attempts=3)
+
+    assert asyncio.run(dispatcher.dispatch_batch()) == 3
+    rows = _outbox()
+    assert rows["ok@example.com"].status == OutboxStatus.sent
+    assert rows["ok@example.com"].sent_at is not None
+    assert rows["retry@example.com"].status == OutboxStatus.pending
+    assert rows["retry@example.com"].attempts == 1
+    assert rows["retry@example.com"].last_error == "timeout"
+    assert rows["retry@example.com"].next_attempt_at > datetime.utcnow()
+    assert rows["last@example.com"].status == OutboxStatus.failed
+    assert rows["last@example.com"].attempts == 3
+    assert all(row.claim_token is None for row in rows.values())
+
+    # Повтор еще не наступил — пачка пуста
+    assert asyncio.run(dispatcher.dispatch_batch()) == 0
+    assert len(mailer.sent) == 3
+
+
+def test_dispatch_keeps_rows_claimed_by_another_worker():
+    _enqueue("mine@example.com", "stolen@example.com")
+
+    def steal_lease():
+        # Аренда истекла во время отправки, и письмо захватил другой воркер
+        with engine.begin() as connection:
+            connection.execute(
+                update(NotificationOutbox).where(NotificationOutbox.recipient == "stolen@example.com")
+                .values(claim_token="other-worker")
+            )
+
+    dispatcher = OutboxDispatcher(mailer=FakeMailer({}, on_send=steal_lease))
+    assert asyncio.run(dispatcher.dispatch_batch()) == 2
+    rows = _outbox()
+    assert rows["mine@example.com"].status == OutboxStatus.sent
+    assert rows["stolen@example.com"].status == OutboxStatus.pending
+    assert rows["stolen@example.com"].claim_token == "other-worker"
+    assert rows["stolen@example.com"].sent_at is None
@@ -0,0 +1,72 @@
+"""Чтение своих записей: после записи GET идет в основную БД в любом воркере."""
+import asyncio
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from app.api.deps import LAST_WRITE_HEADER, recent_writers
+from app.core.database import async_engine, replica_engine
+from conftest import auth, make_client, register
+
+SLOT = {"start_time": "2030-01-01T09:00:00", "end_time": "2030-01-01T10:00:00"}
+
+
+@contextmanager
+def count_statements():
+    counts = {"primary": 0, "replica": 0}
+
+    def counter(name):
+        def record(*args):
+            counts[name] += 1
+        return record
+
+    listeners = [(async_engine.sync_engine, counter("primary")), (replica_engine.sync_engine, counter("replica"))]
+    for target, listener in listeners:
+        event.listen(target, "before_cursor_execute", listener)
+    try:
+        yield counts
+    finally:
+        for target, listener in listeners:
+            event.remove(target, "before_cursor_execute", listener)
+
+
+async def _write_then_read(send_marker: bool):
+    async with make_client() as client:
+        teacher = await register(client, "teacher@example.com", "teacher")
+        teacher_id = teacher["user"]["id"]
+        created = await client.post(f"/api/teachers/{teacher_id}/availability", json=SLOT, headers=auth(teacher))
+        assert created.status_code == 201
+        marker = created.headers[LAST_WRITE_HEADER]
+
+        # Запрос пришел в другой воркер: отметки этого процесса там нет
+        recent_writers.clear()
+        headers = {LAST_WRITE_HEADER: marker} if send_marker else {}
+        with count_statements() as counts:
+            response = await client.get(f"/api/teachers/{teacher_id}/availability", headers=headers)
+        assert response.status_code == 200
+        assert [slot["id"] for slot in response.json()] == [created.json()["id"]]
+        return counts
+
+
+def test_read_after_write_uses_primary_in_another_worker():
+    counts = asyncio.run(_write_then_read(send_marker=True))
+    assert counts["primary"] > 0 and counts["replica"] == 0
+
+
+def test_read_without_marker_uses_replica():
+    counts = asyncio.run(_write_then_read(send_marker=False))
+    assert counts["replica"] > 0 and counts["primary"] == 0
+
+
+def test_stale_or_malformed_marker_is_ignored():
+    async def scenario():
+        async with make_client() as client:
+            teacher = await register(client, "teacher@example.com", "teacher")
+            for marker in ("0", "nan", "not-a-time"):
+                with count_statements() as counts:
+                    response = await client.get(
+                        f"/api/teachers/{teacher['user']['id']}/availability", headers={LAST_WRITE_HEADER: marker}
+                    )
+                assert response.status_code == 200
+                assert counts["primary"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,58 @@
+"""Refresh-токены: фильтр Блума, одноразовая ротация и обнаружение повторного использования."""
+import asyncio
+
+from app.utils.bloom import BloomFilter
+from conftest import auth, make_client, register
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    keys = [f"jti-{index}" for index in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+def test_bloom_filter_false_positive_rate_is_bounded():
+    bloom = BloomFilter(1000, 0.01)
+    for index in range(1000):
+        bloom.add(f"jti-{index}")
+    false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+    # Заданная доля 1% с запасом на разброс
+    assert false_positives < 300
+
+
+async def _refresh(client, refresh_token: str):
+    return await client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_token_is_rotated():
+    async def scenario():
+        async with make_client() as client:
+            tokens = await register(client, "student@example.com", "student")
+            rotated = await _refresh(client, tokens["refresh_token"])
+            assert rotated.status_code == 200
+            fresh = rotated.json()
+            assert fresh["refresh_token"] != tokens["refresh_token"]
+            assert (await client.get("/api/auth/users/me", headers=auth(fresh))).status_code == 200
+            # Новый refresh-токен снова обменивается
+            assert (await _refresh(client, fresh["refresh_token"])).status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_refresh_token_reuse_revokes_all_user_tokens():
+    async def scenario():
+        async with make_client() as client:
+            tokens = await register(client, "student@example.com", "student")
+            other = await register(client, "other@example.com", "student")
+            fresh = (await _refresh(client, tokens["refresh_token"])).json()
+
+            # Старый токен предъявлен повторно — вероятно, украден
+            assert (await _refresh(client, tokens["refresh_token"])).status_code == 401
+            assert (await client.get("/api/auth/users/me", headers=auth(fresh))).status_code == 401
+            assert (await _refresh(client, fresh["refresh_token"])).status_code == 401
+            # Токены других пользователей не затронуты
+            assert (await client.get("/api/auth/users/me", headers=auth(other))).status_code == 200
+
+    asyncio.run(scenario())
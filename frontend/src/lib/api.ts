@@ -9,23 +9,37 @@ export const api = axios.create({
   },
 });
 
-let isRefreshing = false;
-let failedQueue: Array<{
-  resolve: (value: string) => void;
-  reject: (error: unknown) => void;
-}> = [];
-
-const processQueue = (error: unknown, token: string | null = null) => {
-  failedQueue.forEach((prom) => {
-    if (error) {
-      prom.reject(error);
-    } else if (token) {
-      prom.resolve(token);
-    }
-  });
-
-  failedQueue = [];
-};
+let refreshPromise: Promise<string> | null = null;
+
+// Ответ на запись несет время записи; пока оно свежее, сервер по нему
+// читает для нас из основной БД, а не из отстающей реплики
+const LAST_WRITE_HEADER = 'x-last-write';
+let lastWrite: string | undefined;
+
+// Refresh-токен одноразовый: сервер выдает новый при каждом обновлении, а
+// повторное использование старого отзывает все сессии. Поэтому параллельные
+// обновления ждут один общий запрос, и новый refresh-токен сохраняется
+export function refreshAccessToken(): Promise<string> {
+  if (!refreshPromise) {
+    refreshPromise = (async () => {
+      const refreshToken = localStorage.getItem('refresh_token');
+      if (!refreshToken) {
+        throw new Error('No refresh token');
+      }
+      const response = await axios.post<{ access_token: string; refresh_token: string }>(
+        `${API_BASE_URL}/api/auth/refresh`,
+        { refresh_token: refreshToken }
+      );
+      const { access_token, refresh_token } = response.data;
+      localStorage.setItem('access_token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
+      return access_token;
+    })().finally(() => {
+      refreshPromise = null;
+    });
+  }
+  return refreshPromise;
+}
 
 api.interceptors.request.use(
   (config: InternalAxiosRequestConfig) => {
@@ -33,60 +47,41 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    if (lastWrite) {
+      config.headers[LAST_WRITE_HEADER] = lastWrite;
+    }
     return config;
   },
   (error) => Promise.reject(error)
 );
 
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const written = response.headers[LAST_WRITE_HEADER];
+    if (typeof written === 'string' && written) {
+      lastWrite = written;
+    }
+    return response;
+  },
   async (error: AxiosError) => {
     const originalRequest = error.config as InternalAxiosRequestConfig & { _retry?: boolean };
 
     if (error.response?.status === 401 && !originalRequest._retry) {
-      if (isRefreshing) {
-        return new Promise((resolve, reject) => {
-          failedQueue.push({ resolve, reject });
-        })
-          .then((token) => {
-            if (originalRequest.headers) {
-              originalRequest.headers.Authorization = `Bearer ${token}`;
-            }
-            return api(originalRequest);
-          })
-          .catch((err) => Promise.reject(err));
-      }
-
       originalRequest._retry = true;
-      isRefreshing = true;
 
-      const refreshToken = localStorage.getItem('refresh_token');
-
-      if (!refreshToken) {
+      if (!localStorage.getItem('refresh_token')) {
         localStorage.clear();
         window.location.href = '/login';
         return Promise.reject(error);
       }
 
       try {
-        const response = await axios.post(`${API_BASE_URL}/api/auth/refresh`, {
-          refresh_token: refreshToken,
-        });
-
-        const { access_token } = response.data;
-        localStorage.setItem('access_token', access_token);
-
+        const access_token = await refreshAccessToken();
         if (originalRequest.headers) {
           originalRequest.headers.Authorization = `Bearer ${access_token}`;
         }
-
-        processQueue(null, access_token);
-        isRefreshing = false;
-
         return api(originalRequest);
       } catch (refreshError) {
-        processQueue(refreshError, null);
-        isRefreshing = false;
         localStorage.clear();
         window.location.href = '/login';
         return Promise.reject(refreshError);
@@ -96,3 +91,19 @@ api.interceptors.response.use(
     return Promise.reject(error);
   }
 );
+
+const NEXT_CURSOR_HEADER = 'x-next-cursor';
+const PAGE_SIZE = 500; // MAX_PAGE_SIZE на сервере
+
+// Списки отдаются страницами: следуем за X-Next-Cursor, пока сервер его присылает
+export async function fetchAllPages<T>(url: string, params: Record<string, unknown> = {}): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get<T[]>(url, { params: { limit: PAGE_SIZE, ...params, cursor } });
+    items.push(...response.data);
+    const next = response.headers[NEXT_CURSOR_HEADER];
+    cursor = typeof next === 'string' && next ? next : undefined;
+  } while (cursor);
+  return items;
+}
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { useAuthStore } from '../store/authStore';
-import { api } from '../lib/api';
+import { fetchAllPages } from '../lib/api';
 import { Booking } from '../types';
 import { Calendar, Users, BookOpen, TrendingUp } from 'lucide-react';
 import { format } from 'date-fns';
@@ -13,8 +13,7 @@ export function Dashboard() {
   useEffect(() => {
     const fetchBookings = async () => {
       try {
-        const response = await api.get<Booking[]>('/api/bookings');
-        setBookings(response.data);
+        setBookings(await fetchAllPages<Booking>('/api/bookings'));
       } catch (error) {
         console.error('Не удалось получить бронирования:', error);
       } finally {
@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react';
-import { api } from '../lib/api';
+import { api, fetchAllPages } from '../lib/api';
 import { Booking } from '../types';
 import { BookOpen, Calendar, Clock, X, CheckCircle } from 'lucide-react';
 import { format, parseISO } from 'date-fns';
@@ -101,8 +101,7 @@ export function MyBookings() {
 
   const fetchBookings = async () => {
     try {
-      const response = await api.get<Booking[]>('/api/students/my-bookings');
-      setBookings(response.data);
+      setBookings(await fetchAllPages<Booking>('/api/students/my-bookings'));
     } catch (error) {
       console.error('Не удалось получить бронирования:', error);
     } finally {
@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react';
-import { api } from '../lib/api';
+import { api, fetchAllPages } from '../lib/api';
 import { useAuthStore } from '../store/authStore';
 import { AvailabilitySlot } from '../types';
 import { Plus, Calendar, Clock, Trash2, Edit2, X } from 'lucide-react';
@@ -19,8 +19,7 @@ export function TeacherAvailability() {
 
   const fetchSlots = async () => {
     try {
-      const response = await api.get<AvailabilitySlot[]>(`/api/teachers/${user?.id}/availability`);
-      setSlots(response.data);
+      setSlots(await fetchAllPages<AvailabilitySlot>(`/api/teachers/${user?.id}/availability`));
     } catch (error) {
       console.error('Ошибка при получении слотов:', error);
     } finally {
@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react';
-import { api } from '../lib/api';
+import { api, fetchAllPages } from '../lib/api';
 import { Booking } from '../types';
 import { BookOpen, Calendar, Clock, Check, X } from 'lucide-react';
 import { format, parseISO } from 'date-fns';
@@ -15,8 +15,7 @@ export function TeacherBookings() {
 
   const fetchBookings = async () => {
     try {
-      const response = await api.get<Booking[]>('/api/bookings');
-      setBookings(response.data);
+      setBookings(await fetchAllPages<Booking>('/api/bookings'));
     } catch (error) {
       console.error('Не удалось получить брони:', error);
     } finally {
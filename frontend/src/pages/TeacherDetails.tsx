@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { api } from '../lib/api';
+import { api, fetchAllPages } from '../lib/api';
 import { Teacher, AvailabilitySlot } from '../types';
 import { useAuthStore } from '../store/authStore';
 import { format, parseISO } from 'date-fns';
@@ -18,11 +18,12 @@ export function TeacherDetails() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const teacherRes = await api.get<Teacher[]>('/api/teachers');
-        const slotsRes = await api.get<AvailabilitySlot[]>(`/api/teachers/${teacherId}/availability`);
-        const foundTeacher = teacherRes.data.find((t) => t.id === Number(teacherId));
-        setTeacher(foundTeacher || null);
-        setSlots(slotsRes.data.filter((slot) => !slot.is_booked));
+        const [teacherRes, teacherSlots] = await Promise.all([
+          api.get<Teacher>(`/api/teachers/${teacherId}`),
+          fetchAllPages<AvailabilitySlot>(`/api/teachers/${teacherId}/availability`),
+        ]);
+        setTeacher(teacherRes.data);
+        setSlots(teacherSlots.filter((slot) => !slot.is_booked));
       } catch (error) {
         console.error('Ошибка при получении данных преподавателя:', error);
       } finally {
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { api } from '../lib/api';
+import { fetchAllPages } from '../lib/api';
 import { Teacher } from '../types';
 
 export function Teachers() {
@@ -11,8 +11,7 @@ export function Teachers() {
   useEffect(() => {
     const fetchTeachers = async () => {
       try {
-        const response = await api.get<Teacher[]>('/api/teachers');
-        setTeachers(response.data);
+        setTeachers(await fetchAllPages<Teacher>('/api/teachers'));
       } catch (error) {
         console.error('Не удалось загрузить учителей:', error);
       } finally {
@@ -1,5 +1,5 @@
 import { create } from 'zustand';
-import { api } from '../lib/api';
+import { api, refreshAccessToken } from '../lib/api';
 import { User, AuthResponse, LoginRequest, RegisterRequest } from '../types';
 
 interface AuthState {
@@ -91,19 +91,14 @@ export const useAuthStore = create<AuthState>((set, get) => ({
   },
 
   refreshToken: async () => {
-    const refresh_token = localStorage.getItem('refresh_token');
-    if (!refresh_token) {
+    if (!localStorage.getItem('refresh_token')) {
       get().logout();
       return;
     }
 
     try {
-      const response = await api.post<{ access_token: string }>('/api/auth/refresh', {
-        refresh_token,
-      });
-
-      const { access_token } = response.data;
-      localStorage.setItem('access_token', access_token);
+      // Общий запрос с перехватчиком api: refresh-токен одноразовый
+      const access_token = await refreshAccessToken();
       api.defaults.headers.common['Authorization'] = `Bearer ${access_token}`;
 
       const userRes = await api.get<User>('/api/auth/users/me');